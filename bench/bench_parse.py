@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark the profile-page parsers used by scrape_photo_url.
+
+Renders the saved sumo.or.jp profile fixture for a handful of wrestler IDs,
+checks every parser extracts the same photo src, and reports the mean
+per-page parse cost of each.
+
+    python bench/bench_parse.py --rounds 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scrape_rikishi_photos  # noqa: E402
+
+# Constants
+PROFILE_TEMPLATE = Path(__file__).resolve().parent / "fixtures" / "sumo.or.jp" / "profile.html"
+PARSERS = ("soup", "strainer", "fast")
+SAMPLE_IDS = (3207, 3485, 3521, 4101, 4175)
+
+
+def render_profiles(template: Path = PROFILE_TEMPLATE) -> list:
+    """Return profile page bodies for SAMPLE_IDS."""
+    html = template.read_text(encoding="utf-8")
+    return [html.replace("{nskId}", str(i)).encode("utf-8") for i in SAMPLE_IDS]
+
+
+def time_parser(parser: str, pages: list, rounds: int) -> float:
+    """Return the mean seconds per page for a parser."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            scrape_rikishi_photos.extract_photo_src(page, parser)
+    return (time.perf_counter() - start) / (rounds * len(pages))
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Benchmark profile page parsers")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = render_profiles()
+    for page in pages:
+        results = {p: scrape_rikishi_photos.extract_photo_src(page, p) for p in PARSERS}
+        if len(set(results.values())) != 1:
+            print(f"Error: parsers disagree: {results}")
+            sys.exit(1)
+
+    print(f"{len(pages)} pages of {len(pages[0])} bytes, {args.rounds} rounds")
+    baseline = None
+    for name in PARSERS:
+        per_page = time_parser(name, pages, args.rounds)
+        baseline = baseline or per_page
+        print(f"{name:>9}: {per_page * 1000:8.3f} ms/page  ({baseline / per_page:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark harness for scrape_sumo and scrape_rikishi_photos.
+
+Starts the fixture-backed stub server (see stub_server.py) with a
+configurable per-response latency, then runs each scenario's real entry
+point in a fresh subprocess inside a scratch directory and reports the
+requests made, bytes transferred, wall time and peak RSS of every run.
+
+    python bench/run_bench.py --latency 50
+    python bench/run_bench.py --scenario bouts-cold --scenario bouts-warm --json out.json
+
+Scenarios:
+    bouts-cold    scrape_sumo.main from scratch: no rikishi cache, change-detection
+                  state, bout store or output files
+    bouts-warm    scrape_sumo.main again over the previous run's cache and state
+    photos-cold   scrape_rikishi_photos.main into an empty images/
+    photos-warm   scrape_rikishi_photos.main again over the synced images/
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from stub_server import start_stub_server  # noqa: E402
+
+# Constants
+SCENARIOS = ("bouts-cold", "bouts-warm", "photos-cold", "photos-warm")
+BASHO = "202509"
+DAY = "1"
+# Files (glob patterns) each cold scenario removes from the scratch
+# directory first: everything its scraper writes, so a repeated cold run
+# neither reuses a cache nor exits early as unchanged
+COLD_RESET = {
+    "bouts-cold": ("rikishi_cache.json", "rikishi.json", "scrape_state.json", "bouts.sqlite",
+                   "matches*.json*", "data"),
+    "photos-cold": ("images", "photo_manifest.json"),
+}
+# Seeded into the scratch directory whenever missing; the photo scraper
+# reads the wrestlers from matches.json
+SEED_FILES = ("matches.json",)
+
+
+def peak_rss_kb() -> int:
+    """Return this process's peak resident set size in KB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_child(scenario: str):
+    """Run one scenario in this process and print its measurements as JSON."""
+    sys.path.insert(0, str(REPO_DIR))
+    if scenario.startswith("bouts"):
+        import scrape_sumo as module
+    else:
+        import scrape_rikishi_photos as module
+
+    # The scrapers parse their own command line; don't hand them --child
+    sys.argv = [module.__file__]
+    ok = True
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            module.main()
+        except SystemExit as e:
+            ok = not e.code
+    wall = time.perf_counter() - start
+
+    print(json.dumps({"ok": ok, "wall": wall, "peak_rss_kb": peak_rss_kb()}))
+
+
+def reset(workdir: Path, scenario: str):
+    for pattern in COLD_RESET.get(scenario, ()):
+        for path in workdir.glob(pattern):
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+    for name in SEED_FILES:
+        if not (workdir / name).exists():
+            shutil.copy(REPO_DIR / name, workdir / name)
+
+
+def run_scenario(server, workdir: Path, scenario: str) -> dict:
+    """Run a scenario in a subprocess and combine its report with the server's counts."""
+    reset(workdir, scenario)
+    base = f"http://127.0.0.1:{server.server_port}"
+    env = dict(os.environ,
+               SUMO_API_BASE=f"{base}/api",
+               SUMO_SITE_BASE=base,
+               BANZUKE=BASHO,
+               DAY=DAY)
+
+    with server.stats_lock:
+        before = dict(server.stats)
+    proc = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--child", scenario],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    with server.stats_lock:
+        after = dict(server.stats)
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"{scenario} failed:\n{proc.stderr}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report.update(
+        scenario=scenario,
+        requests=after["requests"] - before["requests"],
+        bytes=after["bytes"] - before["bytes"],
+    )
+    return report
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Offline scraper benchmarks")
+    parser.add_argument("--latency", type=float, default=50.0, help="per-response delay in ms")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--json", type=Path, help="also write the reports to this file")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    server = start_stub_server(latency=args.latency / 1000)
+    reports = []
+    with tempfile.TemporaryDirectory(prefix="sumo-bench-") as tmp:
+        workdir = Path(tmp)
+        for scenario in args.scenario or SCENARIOS:
+            reports.append(run_scenario(server, workdir, scenario))
+    server.shutdown()
+
+    print(f"Stub latency {args.latency:g} ms")
+    print(f"{'scenario':<12} {'ok':>3} {'requests':>8} {'bytes':>10} {'wall s':>8} {'peak RSS MB':>11}")
+    for r in reports:
+        print(f"{r['scenario']:<12} {'yes' if r['ok'] else 'no':>3} {r['requests']:>8} {r['bytes']:>10} "
+              f"{r['wall']:>8.3f} {r['peak_rss_kb'] / 1024:>11.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Local stub of sumo-api.com and sumo.or.jp backed by recorded fixtures.
+
+Point the scrapers at it with SUMO_API_BASE / SUMO_SITE_BASE, e.g.:
+
+    python bench/stub_server.py --port 8000 --latency 50 &
+    SUMO_API_BASE=http://127.0.0.1:8000/api BANZUKE=202509 DAY=1 python scrape_sumo.py
+    SUMO_SITE_BASE=http://127.0.0.1:8000 python scrape_rikishi_photos.py
+
+Routes:
+    /api/rikishis?limit=&skip=   paginated slice of fixtures/sumo-api/rikishis.json
+    /api/rikishi/{id}            single record from the same file
+    /api/...                     any other path is served from
+                                 fixtures/sumo-api/<path>.json
+    /EnSumoDataRikishi/profile/{nskId}
+                                 fixtures/sumo.or.jp/profile.html with the ID filled in
+    /img/sumo_data/rikishi/.../{nskId}.jpg
+                                 the recorded photo from images/, with ETag/304 support
+
+Every response can be delayed by a fixed latency, and the server counts
+requests and body bytes sent so callers can measure a run.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# Constants
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+PHOTOS_DIR = Path(__file__).resolve().parent.parent / "images"
+API_PREFIX = "/api/"
+PROFILE_PREFIX = "/EnSumoDataRikishi/profile/"
+PHOTO_PREFIX = "/img/sumo_data/rikishi/"
+
+
+def load_rikishi_records(fixtures_dir: Path = FIXTURES_DIR) -> list:
+    """Load the rikishi listing fixture, returning [] if it is missing."""
+    path = fixtures_dir / "sumo-api" / "rikishis.json"
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("records", [])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve sumo-api and sumo.or.jp fixture responses."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        parts = urlsplit(self.path)
+        if parts.path.startswith(API_PREFIX):
+            route = parts.path[len(API_PREFIX):].strip("/")
+            if route == "rikishis":
+                self.serve_rikishis(parse_qs(parts.query))
+            elif route.startswith("rikishi/"):
+                self.serve_rikishi(route.split("/", 1)[1])
+            else:
+                self.serve_fixture(route)
+        elif parts.path.startswith(PROFILE_PREFIX):
+            self.serve_profile(parts.path[len(PROFILE_PREFIX):].strip("/"))
+        elif parts.path.startswith(PHOTO_PREFIX):
+            self.serve_photo(parts.path.rsplit("/", 1)[1])
+        else:
+            self.send_stub_error(404)
+
+    def serve_rikishis(self, query):
+        records = self.server.rikishi_records
+        limit = int(query.get("limit", ["1000"])[0])
+        skip = int(query.get("skip", ["0"])[0])
+        self.send_json({
+            "limit": limit,
+            "skip": skip,
+            "total": len(records),
+            "records": records[skip:skip + limit],
+        })
+
+    def serve_rikishi(self, wrestler_id):
+        for record in self.server.rikishi_records:
+            if str(record.get("id")) == wrestler_id:
+                self.send_json(record)
+                return
+        self.send_stub_error(404)
+
+    def serve_fixture(self, route):
+        base = (self.server.fixtures_dir / "sumo-api").resolve()
+        path = (base / f"{route}.json").resolve()
+        if base not in path.parents or not path.is_file():
+            self.send_stub_error(404)
+            return
+        self.send_body(path.read_bytes(), "application/json")
+
+    def serve_profile(self, nsk_id):
+        template = self.server.fixtures_dir / "sumo.or.jp" / "profile.html"
+        if not nsk_id.isdigit() or not template.is_file():
+            self.send_stub_error(404)
+            return
+        html = template.read_text(encoding="utf-8").replace("{nskId}", nsk_id)
+        self.send_body(html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def serve_photo(self, filename):
+        stem = filename.rsplit(".", 1)[0]
+        path = self.server.photos_dir / f"{stem}.jpg"
+        if not stem.isdigit() or not path.is_file():
+            self.send_stub_error(404)
+            return
+        body = path.read_bytes()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.count(0)
+            return
+        self.send_body(body, "image/jpeg", {"ETag": etag})
+
+    def send_json(self, payload):
+        self.send_body(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def send_stub_error(self, code: int):
+        self.send_body(b"", "text/plain", status=code)
+
+    def send_body(self, body: bytes, content_type: str, headers: dict = None, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.count(len(body))
+
+    def count(self, nbytes: int):
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+            self.server.stats["bytes"] += nbytes
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_stub_server(port: int = 0, fixtures_dir: Path = FIXTURES_DIR, photos_dir: Path = PHOTOS_DIR,
+                      latency: float = 0.0, verbose: bool = False):
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        fixtures_dir: Directory holding the fixture tree
+        photos_dir: Directory holding recorded {nskId}.jpg photos
+        latency: Seconds to delay every response by
+        verbose: Log every request to stderr
+
+    Returns:
+        The running server; its base URL is f"http://127.0.0.1:{server.server_port}"
+        and server.stats holds the running request/byte counts
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.fixtures_dir = Path(fixtures_dir)
+    server.photos_dir = Path(photos_dir)
+    server.rikishi_records = load_rikishi_records(server.fixtures_dir)
+    server.latency = latency
+    server.verbose = verbose
+    server.stats = {"requests": 0, "bytes": 0}
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--photos", type=Path, default=PHOTOS_DIR)
+    parser.add_argument("--latency", type=float, default=0.0, help="per-response delay in ms")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.fixtures, args.photos, args.latency / 1000, verbose=True)
+    print(f"Stub server listening on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Head-to-head and per-rikishi aggregates over the bout store.
+
+Two aggregate tables live next to the bouts in bouts.sqlite and are kept
+current by triggers on every insert, update and delete of a bout, so each
+scrape's upsert updates them incrementally:
+
+    head_to_head       wins of each rikishi pair, stored with a < b
+    rikishi_kimarite   wins and losses of each rikishi by kimarite
+
+Win/loss records and kimarite distributions are lookups in these tables,
+less any stored bouts on or after an optional (basho, day) cutoff; streaks
+walk the rikishi's most recent bouts through the rikishi ID indexes.
+export_stats writes the figures for one day's bouts as a small JSON file
+the prediction page shows next to each match.
+"""
+
+import json
+
+import bout_store
+
+# Constants
+TOP_KIMARITE = 3
+
+SCHEMA = """
+CREATE TABLE head_to_head (
+    a INTEGER NOT NULL,
+    b INTEGER NOT NULL,
+    a_wins INTEGER NOT NULL,
+    b_wins INTEGER NOT NULL,
+    PRIMARY KEY (a, b)
+);
+CREATE TABLE rikishi_kimarite (
+    rikishi INTEGER NOT NULL,
+    kimarite TEXT NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    PRIMARY KEY (rikishi, kimarite)
+);
+"""
+
+# {sign} is 1 to add a decided bout's row ({row}) to the aggregates, -1 to
+# remove it; bouts with no winner or an unresolved rikishi are not counted
+_APPLY = """
+    INSERT INTO head_to_head (a, b, a_wins, b_wins)
+    VALUES (min({row}.east_id, {row}.west_id), max({row}.east_id, {row}.west_id),
+            {sign} * ({row}.winner = min({row}.east_id, {row}.west_id)),
+            {sign} * ({row}.winner = max({row}.east_id, {row}.west_id)))
+    ON CONFLICT (a, b) DO UPDATE SET
+        a_wins = a_wins + excluded.a_wins, b_wins = b_wins + excluded.b_wins;
+    INSERT INTO rikishi_kimarite (rikishi, kimarite, wins, losses)
+    VALUES ({row}.winner, coalesce({row}.kimarite, ''), {sign}, 0)
+    ON CONFLICT (rikishi, kimarite) DO UPDATE SET wins = wins + excluded.wins;
+    INSERT INTO rikishi_kimarite (rikishi, kimarite, wins, losses)
+    VALUES (CASE WHEN {row}.winner = {row}.east_id THEN {row}.west_id ELSE {row}.east_id END,
+            coalesce({row}.kimarite, ''), 0, {sign})
+    ON CONFLICT (rikishi, kimarite) DO UPDATE SET losses = losses + excluded.losses;
+"""
+
+_DECIDED = "{row}.winner IS NOT NULL AND {row}.east_id IS NOT NULL AND {row}.west_id IS NOT NULL"
+
+TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS bouts_stats_insert AFTER INSERT ON bouts
+WHEN {_DECIDED.format(row="NEW")}
+BEGIN {_APPLY.format(row="NEW", sign=1)} END;
+
+CREATE TRIGGER IF NOT EXISTS bouts_stats_delete AFTER DELETE ON bouts
+WHEN {_DECIDED.format(row="OLD")}
+BEGIN {_APPLY.format(row="OLD", sign=-1)} END;
+
+CREATE TRIGGER IF NOT EXISTS bouts_stats_update_old AFTER UPDATE ON bouts
+WHEN {_DECIDED.format(row="OLD")}
+BEGIN {_APPLY.format(row="OLD", sign=-1)} END;
+
+CREATE TRIGGER IF NOT EXISTS bouts_stats_update_new AFTER UPDATE ON bouts
+WHEN {_DECIDED.format(row="NEW")}
+BEGIN {_APPLY.format(row="NEW", sign=1)} END;
+"""
+
+
+def ensure_indexes(conn):
+    """Create the aggregate tables and triggers, building them from any stored bouts.
+
+    A store that already has them is left untouched, so runs that change
+    nothing don't rewrite the committed file.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'head_to_head'"
+    ).fetchone()
+    triggers = conn.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'bouts_stats_%'"
+    ).fetchone()[0]
+    if exists and triggers == TRIGGERS.count("CREATE TRIGGER"):
+        return
+    with conn:
+        if not exists:
+            conn.executescript(SCHEMA)
+            rebuild(conn)
+        conn.executescript(TRIGGERS)
+
+
+def rebuild(conn):
+    """Recompute both aggregate tables from scratch."""
+    with conn:
+        conn.execute("DELETE FROM head_to_head")
+        conn.execute("DELETE FROM rikishi_kimarite")
+        decided = _DECIDED.replace("{row}.", "")
+        conn.execute(f"""
+            INSERT INTO head_to_head (a, b, a_wins, b_wins)
+            SELECT min(east_id, west_id), max(east_id, west_id),
+                   sum(winner = min(east_id, west_id)), sum(winner = max(east_id, west_id))
+            FROM bouts WHERE {decided}
+            GROUP BY min(east_id, west_id), max(east_id, west_id)
+        """)
+        conn.execute(f"""
+            INSERT INTO rikishi_kimarite (rikishi, kimarite, wins, losses)
+            SELECT rikishi, kimarite, sum(won), sum(1 - won) FROM (
+                SELECT east_id AS rikishi, coalesce(kimarite, '') AS kimarite,
+                       winner = east_id AS won FROM bouts WHERE {decided}
+                UNION ALL
+                SELECT west_id, coalesce(kimarite, ''), winner = west_id FROM bouts WHERE {decided}
+            )
+            GROUP BY rikishi, kimarite
+        """)
+
+
+def _decided_since(conn, wrestler_id, before):
+    """Decided bouts of a rikishi on or after before's (basho, day)."""
+    if not before:
+        return []
+    basho, day = before[0], int(before[1])
+    return conn.execute(f"""
+        SELECT * FROM bouts
+        WHERE (east_id = ? OR west_id = ?) AND (basho > ? OR (basho = ? AND day >= ?))
+            AND {_DECIDED.replace("{row}.", "")}
+    """, (wrestler_id, wrestler_id, basho, basho, day)).fetchall()
+
+
+def head_to_head(conn, first, second, before=None):
+    """
+    Return (first's wins, second's wins) over the stored bouts between them.
+
+    Args:
+        before: Optional (basho, day); only bouts on earlier days count
+    """
+    a, b = sorted((first, second))
+    row = conn.execute("SELECT a_wins, b_wins FROM head_to_head WHERE a = ? AND b = ?",
+                       (a, b)).fetchone()
+    wins = {a: row[0], b: row[1]} if row else {a: 0, b: 0}
+    # The aggregates cover every stored bout; take later ones back out
+    for bout in _decided_since(conn, first, before):
+        if {bout["east_id"], bout["west_id"]} == {a, b}:
+            wins[bout["winner"]] -= 1
+    return wins[first], wins[second]
+
+
+def record(conn, wrestler_id, before=None):
+    """
+    Return a rikishi's (wins, losses) over the stored bouts.
+
+    Args:
+        before: Optional (basho, day); only bouts on earlier days count
+    """
+    row = conn.execute(
+        "SELECT coalesce(sum(wins), 0), coalesce(sum(losses), 0) FROM rikishi_kimarite WHERE rikishi = ?",
+        (wrestler_id,),
+    ).fetchone()
+    wins, losses = row[0], row[1]
+    for bout in _decided_since(conn, wrestler_id, before):
+        if bout["winner"] == wrestler_id:
+            wins -= 1
+        else:
+            losses -= 1
+    return wins, losses
+
+
+def kimarite_distribution(conn, wrestler_id, before=None):
+    """
+    Return a rikishi's winning kimarite as (kimarite, count) pairs, most used first.
+
+    Args:
+        before: Optional (basho, day); only bouts on earlier days count
+    """
+    counts = dict(conn.execute(
+        "SELECT kimarite, wins FROM rikishi_kimarite WHERE rikishi = ? AND wins > 0",
+        (wrestler_id,),
+    ).fetchall())
+    for bout in _decided_since(conn, wrestler_id, before):
+        if bout["winner"] == wrestler_id:
+            counts[bout["kimarite"] or ""] -= 1
+    return sorted(((k, n) for k, n in counts.items() if n > 0 and k),
+                  key=lambda kn: (-kn[1], kn[0]))
+
+
+def streak(conn, wrestler_id, before=None):
+    """
+    Return a rikishi's current streak: N consecutive wins as N, losses as -N.
+
+    Args:
+        conn: Bout store connection
+        wrestler_id: The rikishi's ID
+        before: Optional (basho, day); only bouts on earlier days count
+    """
+    current = 0
+    for bout in reversed(bout_store.rikishi_bouts(conn, wrestler_id)):
+        if before and (bout["basho"], bout["day"]) >= (before[0], int(before[1])):
+            continue
+        if bout["winner"] is None:
+            continue
+        won = 1 if bout["winner"] == wrestler_id else -1
+        if current and (current > 0) != (won > 0):
+            break
+        current += won
+    return current
+
+
+def bout_stats(conn, bout, basho, day):
+    """
+    Figures for one bout of (basho, day) as they stood before it was fought.
+
+    Only bouts on earlier days count, so neither this bout's result nor
+    any later stored day (e.g. after a backfill) leaks into the figures.
+
+    Returns:
+        {"h2h": [east wins, west wins], "east": {...}, "west": {...}} where each
+        side has "w"/"l" (record), "streak" and "kimarite" (top winning kimarite)
+    """
+    east, west = bout["east"]["id"], bout["west"]["id"]
+    stats = {"h2h": [0, 0], "east": None, "west": None}
+    if east is None or west is None:
+        return stats
+
+    before = (basho, day)
+    stats["h2h"] = list(head_to_head(conn, east, west, before))
+    for side, wrestler_id in (("east", east), ("west", west)):
+        wins, losses = record(conn, wrestler_id, before)
+        stats[side] = {
+            "w": wins,
+            "l": losses,
+            "streak": streak(conn, wrestler_id, before),
+            "kimarite": [list(kn) for kn in kimarite_distribution(conn, wrestler_id, before)[:TOP_KIMARITE]],
+        }
+    return stats
+
+
+def export_stats(conn, basho, day, division, output_file):
+    """
+    Write per-bout stats for one stored day, in the same order as its bouts.
+
+    Returns:
+        True if the file was (re)written
+    """
+    stats = [bout_stats(conn, bout, basho, day)
+             for bout in bout_store.load_bouts(conn, basho, day, division)]
+    data = json.dumps(stats, separators=(",", ":"), ensure_ascii=False) + "\n"
+    try:
+        with open(output_file, "r", encoding="utf-8") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(data)
+    return True
@@ -0,0 +1,132 @@
+"""
+Local SQLite store of every scraped bout.
+
+Each scrape upserts its bouts keyed by (basho, division, day, bout index),
+and the matches files are exported from the store, so history across days
+and tournaments survives without replaying git. Bouts are indexed on both
+rikishi IDs (the nskId used in matches.json) for per-wrestler queries.
+
+The store lives in bouts.sqlite and is committed by the scrape workflow.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+# Constants
+STORE_FILE = os.environ.get("BOUT_STORE", "bouts.sqlite")
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bouts (
+    basho TEXT NOT NULL,
+    division TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    east_id INTEGER,
+    east_name TEXT NOT NULL,
+    west_id INTEGER,
+    west_name TEXT NOT NULL,
+    kimarite TEXT,
+    winner INTEGER,
+    updated TEXT NOT NULL,
+    PRIMARY KEY (basho, division, day, idx)
+);
+CREATE INDEX IF NOT EXISTS bouts_east_id ON bouts (east_id);
+CREATE INDEX IF NOT EXISTS bouts_west_id ON bouts (west_id);
+"""
+
+
+def connect(path=None):
+    """Open (creating if needed) the bout store."""
+    conn = sqlite3.connect(path or STORE_FILE)
+    conn.row_factory = sqlite3.Row
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        conn.close()
+        raise RuntimeError(f"bout store {path or STORE_FILE} has unknown schema version {version}")
+    # Leave an up-to-date store untouched, so runs that change nothing don't
+    # rewrite the committed file
+    if version != SCHEMA_VERSION:
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def upsert_bouts(conn, basho, day, division, bouts):
+    """
+    Insert or update one day's bouts for a division.
+
+    Bouts past the end of the list (if a torikumi shrank) are removed, so
+    the stored day always matches the latest scrape.
+
+    Returns:
+        The number of rows inserted or changed
+    """
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    rows = [
+        (basho, division, int(day), idx,
+         bout["east"]["id"], bout["east"]["name"], bout["west"]["id"], bout["west"]["name"],
+         bout["kimarite"], bout["winner"], now)
+        for idx, bout in enumerate(bouts)
+    ]
+    with conn:
+        # Only touch rows whose contents differ, so "updated" stays meaningful;
+        # rowcount leaves out rows written by triggers on the bouts table
+        changed = conn.executemany("""
+            INSERT INTO bouts (basho, division, day, idx, east_id, east_name,
+                               west_id, west_name, kimarite, winner, updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (basho, division, day, idx) DO UPDATE SET
+                east_id = excluded.east_id, east_name = excluded.east_name,
+                west_id = excluded.west_id, west_name = excluded.west_name,
+                kimarite = excluded.kimarite, winner = excluded.winner,
+                updated = excluded.updated
+            WHERE (east_id, east_name, west_id, west_name, kimarite, winner)
+                IS NOT (excluded.east_id, excluded.east_name, excluded.west_id,
+                        excluded.west_name, excluded.kimarite, excluded.winner)
+        """, rows).rowcount
+        changed += conn.execute(
+            "DELETE FROM bouts WHERE basho = ? AND division = ? AND day = ? AND idx >= ?",
+            (basho, division, int(day), len(rows)),
+        ).rowcount
+        return changed
+
+
+def row_to_bout(row):
+    """Convert a bouts row back into a matches.json bout dict."""
+    return {
+        "east": {"name": row["east_name"], "id": row["east_id"]},
+        "west": {"name": row["west_name"], "id": row["west_id"]},
+        "kimarite": row["kimarite"],
+        "winner": row["winner"],
+    }
+
+
+def load_bouts(conn, basho, day, division):
+    """Return one day's bouts for a division in torikumi order."""
+    rows = conn.execute(
+        "SELECT * FROM bouts WHERE basho = ? AND division = ? AND day = ? ORDER BY idx",
+        (basho, division, int(day)),
+    )
+    return [row_to_bout(row) for row in rows]
+
+
+def stored_days(conn, division=None):
+    """Return the (basho, day, division) keys in the store, oldest first."""
+    query = "SELECT DISTINCT basho, day, division FROM bouts"
+    params = ()
+    if division:
+        query += " WHERE division = ?"
+        params = (division,)
+    return [tuple(row) for row in conn.execute(query + " ORDER BY basho, day, division", params)]
+
+
+def rikishi_bouts(conn, wrestler_id):
+    """Return every stored bout involving a rikishi, oldest first."""
+    return conn.execute("""
+        SELECT * FROM bouts WHERE east_id = ?
+        UNION ALL
+        SELECT * FROM bouts WHERE west_id = ?
+        ORDER BY basho, day, division, idx
+    """, (wrestler_id, wrestler_id)).fetchall()
@@ -0,0 +1,203 @@
+"""
+Shared HTTP client for the scrapers.
+
+Provides a single keep-alive requests.Session with connection pooling,
+retry/backoff on transient failures, a default timeout and a per-host cap
+on concurrent requests, so sumo-api.com and sumo.or.jp connections are
+reused instead of paying a TCP+TLS handshake on every call.
+
+Every request is timed and recorded (endpoint, status, latency, bytes,
+retries); write_run_report appends them to a JSON-lines run report.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Constants
+DEFAULT_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 10))
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+# Politeness limit: requests in flight to any single host at once
+HOST_CONCURRENCY = int(os.environ.get("HTTP_HOST_CONCURRENCY", 4))
+METRICS_FILE = os.environ.get("HTTP_METRICS_FILE", "run_report.jsonl")
+USER_AGENT = "jubilant-octo-potato scraper (+https://binarytoast.github.io/jubilant-octo-potato/)"
+
+_session = None
+_session_lock = threading.Lock()
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+_records = []
+_records_lock = threading.Lock()
+
+
+def create_session() -> requests.Session:
+    """Build a Session with pooled, retrying adapters mounted for http(s)."""
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_SIZE,
+        pool_maxsize=POOL_SIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide shared Session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(max(1, HOST_CONCURRENCY))
+            _host_slots[host] = slot
+    return slot
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    GET a URL through the shared session.
+
+    Args:
+        url: The URL to fetch
+        **kwargs: Passed through to Session.get; timeout defaults to
+            DEFAULT_TIMEOUT
+
+    Returns:
+        The Response (retries on 429/5xx have already been exhausted)
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    with _host_slot(url):
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, **kwargs)
+        except requests.RequestException as e:
+            _record(url, None, time.perf_counter() - start, 0, _retries_from_error(e), error=str(e))
+            raise
+        _record(url, response.status_code, time.perf_counter() - start,
+                _response_bytes(response, kwargs.get("stream")), _retries(response))
+        return response
+
+
+def endpoint_for(url: str) -> str:
+    """Collapse a URL to host + path with numbers templated, e.g. host/api/rikishi/{n}."""
+    parts = urlsplit(url)
+    return parts.netloc + re.sub(r"\d+", "{n}", parts.path)
+
+
+def _response_bytes(response: requests.Response, stream: bool):
+    # A streamed body has not been read yet, so trust Content-Length
+    if stream:
+        length = response.headers.get("Content-Length")
+        return int(length) if length and length.isdigit() else None
+    return len(response.content)
+
+
+def _retries(response: requests.Response) -> int:
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def _retries_from_error(error: Exception) -> int:
+    reason = error.args[0] if error.args else None
+    retries = getattr(reason, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def _record(url, status, latency, nbytes, retries, error=None):
+    record = {
+        "endpoint": endpoint_for(url),
+        "url": url,
+        "status": status,
+        "latency_ms": round(latency * 1000, 1),
+        "bytes": nbytes,
+        "retries": retries,
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+    }
+    if error:
+        record["error"] = error
+    with _records_lock:
+        _records.append(record)
+
+
+def get_records() -> list:
+    """Return a copy of the requests recorded so far in this process."""
+    with _records_lock:
+        return list(_records)
+
+
+def summarize(records: list) -> dict:
+    """Aggregate request records into totals, overall and per endpoint."""
+    endpoints = {}
+    for record in records:
+        stats = endpoints.setdefault(record["endpoint"], {
+            "requests": 0, "errors": 0, "retries": 0, "latency_ms": 0.0, "bytes": 0,
+        })
+        stats["requests"] += 1
+        stats["retries"] += record["retries"]
+        stats["latency_ms"] = round(stats["latency_ms"] + record["latency_ms"], 1)
+        stats["bytes"] += record["bytes"] or 0
+        if record["status"] is None or record["status"] >= 400:
+            stats["errors"] += 1
+
+    totals = {key: sum(e[key] for e in endpoints.values())
+              for key in ("requests", "errors", "retries", "bytes")}
+    totals["latency_ms"] = round(sum(e["latency_ms"] for e in endpoints.values()), 1)
+    totals["endpoints"] = endpoints
+    return totals
+
+
+def write_run_report(script: str, path: str = None) -> dict:
+    """
+    Append this run's request records and a summary line to the run report.
+
+    Args:
+        script: Name of the script the run belongs to
+        path: JSON-lines file to append to; defaults to METRICS_FILE
+
+    Returns:
+        The summary record
+    """
+    records = get_records()
+    run_id = uuid.uuid4().hex[:12]
+    summary = dict(summarize(records), type="summary", run=run_id, script=script,
+                   ts=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+    with open(path or METRICS_FILE, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict(record, type="request", run=run_id, script=script)) + "\n")
+        f.write(json.dumps(summary) + "\n")
+
+    print(f"HTTP: {summary['requests']} requests, {summary['bytes']} bytes, "
+          f"{summary['latency_ms'] / 1000:.2f}s total latency, {summary['retries']} retries")
+    return summary
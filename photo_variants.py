@@ -0,0 +1,269 @@
+"""
+Responsive variants of the rikishi photos in images/.
+
+For every images/{id}.jpg this writes resized, recompressed JPEG and WebP
+copies (and AVIF when Pillow supports it and PHOTO_AVIF=1) at a few target
+widths into images/variants/, plus a manifest the page uses to build a
+srcset. Variants are only regenerated when the source photo's hash changes.
+
+It also packs the photos of one day's bouts into a single content-hashed
+sprite sheet (images/sprites/) with an offsets index, so the page can fetch
+every face for the day in one request.
+
+Pillow is optional: without it the stage is skipped.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+from typing import Iterable, Optional
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is optional
+    Image = None
+    features = None
+
+# Constants
+IMAGES_DIR = "images"
+VARIANTS_DIR = os.path.join(IMAGES_DIR, "variants")
+MANIFEST_FILE = os.path.join(VARIANTS_DIR, "manifest.json")
+# Card widths in CSS pixels (150px desktop card, 2x for high-DPI screens);
+# widths above the source width are clamped to it
+VARIANT_WIDTHS = tuple(int(w) for w in os.environ.get("PHOTO_VARIANT_WIDTHS", "150,300").split(","))
+JPEG_QUALITY = 78
+WEBP_QUALITY = 72
+AVIF_QUALITY = 50
+SPRITES_DIR = os.path.join(IMAGES_DIR, "sprites")
+SPRITE_INDEX = os.path.join(SPRITES_DIR, "sprite.json")
+# Sprite tile: the 150x260 card at 1.8x, which is the photos' native width
+SPRITE_TILE = (270, 468)
+
+
+def available() -> bool:
+    """Return True if Pillow is installed and variants can be generated."""
+    return Image is not None
+
+
+def variant_formats() -> list:
+    """Return the formats to generate, best compression first."""
+    formats = ["webp", "jpeg"]
+    if os.environ.get("PHOTO_AVIF") == "1" and features is not None and features.check("avif"):
+        formats.insert(0, "avif")
+    return formats
+
+
+def variant_path(wrestler_id, width: int, fmt: str) -> str:
+    """Return the path of one variant file."""
+    ext = "jpg" if fmt == "jpeg" else fmt
+    return os.path.join(VARIANTS_DIR, f"{wrestler_id}-{width}.{ext}")
+
+
+def load_manifest() -> dict:
+    """Load the variants manifest (wrestler ID -> source hash/widths/formats)."""
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read {MANIFEST_FILE}, regenerating variants: {e}")
+        return {}
+
+
+def save_manifest(manifest: dict):
+    """Write the variants manifest, compact since the page fetches it."""
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, sort_keys=True, separators=(",", ":"))
+        f.write("\n")
+
+
+def _save(image, path: str, fmt: str):
+    if fmt == "jpeg":
+        image.save(path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == "webp":
+        image.save(path, "WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(path, "AVIF", quality=AVIF_QUALITY)
+
+
+def generate_variants(wrestler_id, source: str) -> Optional[dict]:
+    """
+    Generate every width/format variant of one photo.
+
+    Args:
+        wrestler_id: The wrestler's ID number
+        source: Path of the original photo
+
+    Returns:
+        The widths ("w") and formats ("f") written, or None if the photo
+        could not be read
+    """
+    try:
+        with Image.open(source) as original:
+            original = original.convert("RGB")
+            widths = sorted({min(w, original.width) for w in VARIANT_WIDTHS})
+            formats = variant_formats()
+            for width in widths:
+                height = round(original.height * width / original.width)
+                resized = original if width == original.width else \
+                    original.resize((width, height), Image.LANCZOS)
+                for fmt in formats:
+                    _save(resized, variant_path(wrestler_id, width, fmt), fmt)
+    except OSError as e:
+        print(f"Warning: Could not generate variants for wrestler ID {wrestler_id}: {e}")
+        return None
+
+    return {"w": widths, "f": formats}
+
+
+def update_variants(wrestler_ids: Iterable) -> dict:
+    """
+    Bring variants up to date for the given wrestlers' photos.
+
+    Returns:
+        Counts of generated, skipped (already current) and missing photos
+    """
+    counts = {"generated": 0, "skipped": 0, "missing": 0}
+    if not available():
+        print("Pillow not installed, skipping photo variants")
+        return counts
+
+    os.makedirs(VARIANTS_DIR, exist_ok=True)
+    manifest = load_manifest()
+    formats = variant_formats()
+
+    for wrestler_id in sorted(wrestler_ids):
+        source = os.path.join(IMAGES_DIR, f"{wrestler_id}.jpg")
+        if not os.path.exists(source):
+            counts["missing"] += 1
+            continue
+
+        entry = manifest.get(str(wrestler_id))
+        with open(source, "rb") as f:
+            source_sha = hashlib.sha256(f.read()).hexdigest()
+        if (entry and entry.get("sha256") == source_sha and entry.get("f") == formats
+                and all(os.path.exists(variant_path(wrestler_id, w, fmt))
+                        for w in entry.get("w", []) for fmt in formats)):
+            counts["skipped"] += 1
+            continue
+
+        entry = generate_variants(wrestler_id, source)
+        if entry:
+            manifest[str(wrestler_id)] = dict(entry, sha256=source_sha)
+            counts["generated"] += 1
+
+    save_manifest(manifest)
+    return counts
+
+
+def _sprite_key(sources: dict) -> str:
+    digest = hashlib.sha256()
+    for wrestler_id in sorted(sources, key=int):
+        with open(sources[wrestler_id], "rb") as f:
+            digest.update(f"{wrestler_id}:{hashlib.sha256(f.read()).hexdigest()}\n".encode())
+    digest.update(f"{SPRITE_TILE}:{WEBP_QUALITY}:{JPEG_QUALITY}".encode())
+    return digest.hexdigest()[:12]
+
+
+def _fit_tile(image):
+    """Scale and centre-crop a photo to cover one sprite tile."""
+    tile_w, tile_h = SPRITE_TILE
+    scale = max(tile_w / image.width, tile_h / image.height)
+    resized = image.resize((max(tile_w, round(image.width * scale)),
+                            max(tile_h, round(image.height * scale))), Image.LANCZOS)
+    left = (resized.width - tile_w) // 2
+    top = (resized.height - tile_h) // 2
+    return resized.crop((left, top, left + tile_w, top + tile_h))
+
+
+def update_sprite(wrestler_ids: Iterable) -> bool:
+    """
+    Pack the given wrestlers' photos into one sprite sheet.
+
+    Writes images/sprites/sprite.<hash>.{webp,jpg} and an index
+    (images/sprites/sprite.json) mapping wrestler ID to the tile's x/y
+    offset. The sheet the index pointed to before is kept for clients that
+    fetched the old index; anything older is removed.
+
+    Returns:
+        True if a new sprite sheet was written
+    """
+    if not available():
+        print("Pillow not installed, skipping photo sprite")
+        return False
+
+    sources = {}
+    for wrestler_id in wrestler_ids:
+        source = os.path.join(IMAGES_DIR, f"{wrestler_id}.jpg")
+        if os.path.exists(source):
+            sources[str(wrestler_id)] = source
+    if not sources:
+        return False
+
+    key = _sprite_key(sources)
+    stem = os.path.join(SPRITES_DIR, f"sprite.{key}")
+    try:
+        with open(SPRITE_INDEX, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    if previous.get("key") == key and all(os.path.exists(f"{stem}.{ext}") for ext in ("webp", "jpg")):
+        return False
+
+    tile_w, tile_h = SPRITE_TILE
+    columns = math.ceil(math.sqrt(len(sources)))
+    rows = math.ceil(len(sources) / columns)
+    sheet = Image.new("RGB", (columns * tile_w, rows * tile_h), "white")
+    tiles = {}
+    for position, wrestler_id in enumerate(sorted(sources, key=int)):
+        x, y = (position % columns) * tile_w, (position // columns) * tile_h
+        try:
+            with Image.open(sources[wrestler_id]) as photo:
+                sheet.paste(_fit_tile(photo.convert("RGB")), (x, y))
+        except OSError as e:
+            print(f"Warning: Could not add wrestler ID {wrestler_id} to sprite: {e}")
+            continue
+        tiles[wrestler_id] = [x, y]
+
+    os.makedirs(SPRITES_DIR, exist_ok=True)
+    _save(sheet, f"{stem}.webp", "webp")
+    _save(sheet, f"{stem}.jpg", "jpeg")
+    index = {
+        "key": key,
+        "file": os.path.basename(stem),
+        "f": ["webp", "jpeg"],
+        "tile": [tile_w, tile_h],
+        "tiles": tiles,
+    }
+    with open(SPRITE_INDEX, "w", encoding="utf-8") as f:
+        json.dump(index, f, sort_keys=True, separators=(",", ":"))
+        f.write("\n")
+
+    keep = {index["file"], previous.get("file")}
+    pattern = re.compile(r"(sprite\.[0-9a-f]{12})\.(webp|jpg)")
+    for name in os.listdir(SPRITES_DIR):
+        match = pattern.fullmatch(name)
+        if match and match.group(1) not in keep:
+            os.remove(os.path.join(SPRITES_DIR, name))
+    return True
+
+
+def main():
+    """Build variants and the sprite sheet for the wrestlers in matches.json."""
+    import scrape_rikishi_photos
+
+    wrestler_ids = scrape_rikishi_photos.extract_wrestler_ids()
+    counts = update_variants(wrestler_ids)
+    print(f"Photo variants generated: {counts['generated']}, up to date: {counts['skipped']}, "
+          f"missing photo: {counts['missing']}")
+    if update_sprite(wrestler_ids):
+        print(f"Wrote photo sprite for {len(wrestler_ids)} wrestlers")
+    else:
+        print("Photo sprite up to date")
+
+
+if __name__ == "__main__":
+    main()
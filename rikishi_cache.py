@@ -0,0 +1,158 @@
+"""
+Persistent on-disk cache of sumo-api rikishi records.
+
+Each entry keeps the rikishi's nskId plus profile fields (shikona, heya,
+rank, height/weight, birth date). The cache lives in rikishi_cache.json
+next to matches.json and is committed by the scrape workflow, so scheduled
+runs only hit /api/rikishi/{id} for wrestlers that have never been seen
+(or whose entry has expired). export_profiles writes the profiles keyed by
+nskId to rikishi.json for the page and the photo scraper.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+# Constants
+CACHE_FILE = "rikishi_cache.json"
+CACHE_VERSION = 1
+DEFAULT_TTL_DAYS = 90
+PROFILES_FILE = "rikishi.json"
+# Fields of a sumo-api rikishi record kept alongside the nskId
+PROFILE_FIELDS = ("shikonaEn", "shikonaJp", "heya", "currentRank", "height", "weight", "birthDate")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def get_ttl():
+    """Return the cache TTL, configurable via RIKISHI_CACHE_TTL_DAYS."""
+    try:
+        days = float(os.environ.get("RIKISHI_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS))
+    except ValueError:
+        print("Warning: RIKISHI_CACHE_TTL_DAYS is not a number, using default")
+        days = DEFAULT_TTL_DAYS
+    return timedelta(days=days)
+
+
+def new_cache():
+    """Return an empty cache (also usable as a purely in-memory index)."""
+    return {"version": CACHE_VERSION, "rikishi": {}}
+
+
+def load_cache(path=CACHE_FILE):
+    """Load the cache from disk, returning an empty cache if missing or stale."""
+    if os.environ.get("RIKISHI_CACHE_REFRESH"):
+        print("RIKISHI_CACHE_REFRESH set, ignoring existing rikishi cache")
+        return new_cache()
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return new_cache()
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read rikishi cache {path}: {e}")
+        return new_cache()
+
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        print(f"Warning: Discarding rikishi cache {path} with unknown format")
+        return new_cache()
+
+    cache.setdefault("rikishi", {})
+    return cache
+
+
+def save_cache(cache, path=CACHE_FILE):
+    """Write the cache to disk, sorted so diffs stay small."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def get_cached_rikishi(cache, wrestler_id):
+    """Return a wrestler's cache entry, or None if it is missing or expired."""
+    entry = cache["rikishi"].get(str(wrestler_id))
+    if not entry:
+        return None
+
+    try:
+        fetched = datetime.fromisoformat(entry["fetched"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if _now() - fetched > get_ttl():
+        return None
+
+    return entry
+
+
+def get_cached_nskid(cache, wrestler_id):
+    """
+    Look up a wrestler in the cache.
+
+    Returns:
+        A (hit, nskId) tuple; hit is False when the entry is missing or expired.
+    """
+    entry = get_cached_rikishi(cache, wrestler_id)
+    if entry is None:
+        return False, None
+    return True, entry.get("nskId")
+
+
+def store_rikishi(cache, wrestler_id, record):
+    """Record a freshly fetched sumo-api rikishi record in the cache."""
+    entry = {field: record[field] for field in PROFILE_FIELDS if record.get(field)}
+    entry["nskId"] = record.get("nskId")
+    entry["fetched"] = _now().isoformat(timespec="seconds")
+    cache["rikishi"][str(wrestler_id)] = entry
+
+
+def export_profiles(cache, path=PROFILES_FILE):
+    """
+    Write every cached rikishi's profile, keyed by nskId, to path.
+
+    Returns:
+        True if the file was (re)written
+    """
+    profiles = {}
+    for wrestler_id, entry in cache["rikishi"].items():
+        if entry.get("nskId"):
+            profiles[str(entry["nskId"])] = dict(
+                {field: entry[field] for field in PROFILE_FIELDS if field in entry},
+                id=int(wrestler_id),
+            )
+
+    data = json.dumps(profiles, indent=1, sort_keys=True, ensure_ascii=False) + "\n"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+    return True
+
+
+def was_prefetched(cache, basho):
+    """Return True if the bulk rikishi index was already loaded for basho."""
+    return cache.get("prefetched") == str(basho)
+
+
+def mark_prefetched(cache, basho):
+    """Record that the bulk rikishi index has been loaded for basho."""
+    cache["prefetched"] = str(basho)
+
+
+def invalidate(cache, wrestler_ids=None):
+    """Drop the given wrestler IDs from the cache, or every entry if None."""
+    if wrestler_ids is None:
+        cache["rikishi"].clear()
+        cache.pop("prefetched", None)
+        return
+    for wrestler_id in wrestler_ids:
+        cache["rikishi"].pop(str(wrestler_id), None)
@@ -1,21 +1,53 @@
 #!/usr/bin/env python3
 """
 Script to scrape rikishi (sumo wrestler) photos from the official sumo website.
-Extracts wrestler IDs from matches.json and downloads their photos.
+Takes every rikishi on the current basho's banzuke (resolved to nskIds
+through the rikishi cache) plus anyone in matches.json, and downloads
+their photos, so a whole tournament is synced in one pass on day 1.
+Set PHOTO_SOURCE=matches to sync only the wrestlers in matches.json.
+
+Runs incrementally: photos already in images/ whose content hash matches
+photo_manifest.json are skipped without any request. Set PHOTO_SYNC=full
+to re-fetch everything, or PHOTO_REFRESH_DAYS to re-check entries older
+than that many days.
 """
 
+import hashlib
 import json
 import os
+import tempfile
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from html.parser import HTMLParser
 from pathlib import Path
 from urllib.parse import urljoin
-from typing import Set
+from typing import Dict, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import http_client
+import photo_variants
+import rikishi_cache
+import scrape_sumo
 
 # Constants
 MATCHES_FILE = "matches.json"
 IMAGES_DIR = "images"
-BASE_URL = "https://www.sumo.or.jp/EnSumoDataRikishi/profile"
+MANIFEST_FILE = "photo_manifest.json"
+SITE_URL = os.environ.get("SUMO_SITE_BASE", "https://www.sumo.or.jp").rstrip("/")
+BASE_URL = f"{SITE_URL}/EnSumoDataRikishi/profile"
+# Profile page parser: "fast" (streaming stdlib scan that stops at the
+# photo), "strainer" (BeautifulSoup over <img> tags only, lxml if
+# installed) or "soup" (full html.parser tree)
+PHOTO_PARSER = os.environ.get("PHOTO_PARSER", "fast")
+# Streaming download chunk size and sanity bounds for a photo body
+CHUNK_SIZE = 64 * 1024
+MIN_PHOTO_BYTES = 1024
+MAX_PHOTO_BYTES = 5 * 1024 * 1024
+# Concurrent profile fetches/parses and photo downloads; requests to
+# sumo.or.jp are additionally capped per host by http_client
+PROFILE_WORKERS = int(os.environ.get("PHOTO_PROFILE_WORKERS", 8))
+DOWNLOAD_WORKERS = int(os.environ.get("PHOTO_DOWNLOAD_WORKERS", 4))
 
 def create_images_directory():
     """Create the images directory if it doesn't exist."""
@@ -23,20 +55,197 @@ def create_images_directory():
     print(f"Ensured {IMAGES_DIR} directory exists")
 
 def extract_wrestler_ids() -> Set[int]:
-    """Extract unique wrestler IDs from matches.json."""
+    """Extract unique wrestler IDs from matches.json, skipping unresolved ones."""
     with open(MATCHES_FILE, 'r') as f:
-        matches = json.load(f)
+        matches = scrape_sumo.expand_bouts(json.load(f))
     
     ids = set()
     for match in matches:
-        if 'east' in match and 'id' in match['east']:
+        if 'east' in match and match['east'].get('id'):
             ids.add(match['east']['id'])
-        if 'west' in match and 'id' in match['west']:
+        if 'west' in match and match['west'].get('id'):
             ids.add(match['west']['id'])
     
     print(f"Found {len(ids)} unique wrestler IDs")
     return ids
 
+def extract_banzuke_ids(basho: str, divisions) -> Set[int]:
+    """
+    Collect the nskIds of every rikishi on a basho's banzuke.
+
+    Banzuke entries carry sumo-api IDs, which are resolved through the
+    shared rikishi cache (one bulk prefetch per basho at most), and the
+    updated cache is saved.
+
+    Args:
+        basho: Basho code YYYYMM
+        divisions: Divisions whose banzuke to read
+
+    Returns:
+        Set of nskIds; divisions whose banzuke could not be fetched are skipped
+    """
+    api_ids = []
+    for division in divisions:
+        try:
+            api_ids.extend(scrape_sumo.fetch_banzuke(basho, division))
+        except Exception as e:
+            print(f"Warning: Could not fetch {division} banzuke for {basho}: {e}")
+    if not api_ids:
+        return set()
+
+    cache = rikishi_cache.load_cache()
+    nsk_ids = scrape_sumo.resolve_rikishi_ids(api_ids, cache, basho=basho)
+    scrape_sumo.save_rikishi_cache(cache)
+
+    ids = {nsk_id for nsk_id in nsk_ids.values() if nsk_id}
+    print(f"Found {len(ids)} rikishi on the {basho} banzuke ({', '.join(divisions)})")
+    return ids
+
+def photo_path(wrestler_id: int) -> str:
+    """Return the on-disk path of a wrestler's photo."""
+    return os.path.join(IMAGES_DIR, f"{wrestler_id}.jpg")
+
+def file_sha256(filename: str) -> str:
+    """Return the hex SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest() -> dict:
+    """Load the photo manifest (wrestler ID -> url/hash/validators)."""
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read {MANIFEST_FILE}, starting fresh: {e}")
+        return {}
+
+def save_manifest(manifest: dict):
+    """Write the photo manifest, sorted so diffs stay small."""
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+def record_photo(manifest: dict, wrestler_id: int, photo_url: Optional[str]):
+    """Store the current hash (and source URL) of a photo on disk."""
+    entry = manifest.setdefault(str(wrestler_id), {})
+    if photo_url:
+        entry['url'] = photo_url
+    entry['sha256'] = file_sha256(photo_path(wrestler_id))
+    entry['checked'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+def needs_sync(manifest: dict, wrestler_id: int, full: bool, refresh_after: Optional[timedelta]) -> Optional[str]:
+    """
+    Decide whether a wrestler's photo has to be fetched.
+
+    Args:
+        manifest: The photo manifest
+        wrestler_id: The wrestler's ID number
+        full: Re-fetch regardless of what is on disk
+        refresh_after: Re-check entries last checked longer ago than this
+
+    Returns:
+        'new' or 'updated' if the photo must be fetched, None to skip it
+    """
+    filename = photo_path(wrestler_id)
+    if not os.path.exists(filename):
+        return 'new'
+    if full:
+        return 'updated'
+
+    entry = manifest.get(str(wrestler_id))
+    if entry is None:
+        # Photo predates the manifest; adopt it as-is
+        record_photo(manifest, wrestler_id, None)
+        return None
+    if entry.get('sha256') != file_sha256(filename):
+        # The local copy no longer matches, so its validators are meaningless
+        entry.pop('etag', None)
+        entry.pop('last_modified', None)
+        return 'updated'
+    if refresh_after is not None:
+        try:
+            checked = datetime.fromisoformat(entry['checked'])
+        except (KeyError, TypeError, ValueError):
+            return 'updated'
+        if datetime.now(timezone.utc) - checked > refresh_after:
+            return 'updated'
+    return None
+
+class _PhotoImgScanner(HTMLParser):
+    """Find the photo <img> attributes, stopping at the first rikishi_photo."""
+    
+    class Found(Exception):
+        pass
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.exact = None
+        self.fallback = None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag != 'img':
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if 'rikishi_photo' in classes:
+            self.exact = attrs
+            raise self.Found()
+        if self.fallback is None and any('photo' in c.lower() for c in classes):
+            self.fallback = attrs
+
+def _soup_photo_src(soup: BeautifulSoup) -> Optional[str]:
+    # The photo is typically in an img tag with class 'rikishi_photo' or similar
+    photo_img = soup.find('img', class_='rikishi_photo')
+    
+    if not photo_img:
+        # Try alternative selectors
+        photo_img = soup.find('img', class_=lambda x: x and 'photo' in x.lower())
+    
+    return photo_img.get('src') if photo_img else None
+
+def _strainer_parser() -> str:
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+def extract_photo_src(html, parser: str = None) -> Optional[str]:
+    """
+    Extract the raw photo src from a profile page.
+    
+    Args:
+        html: The profile page body (bytes or str)
+        parser: "fast", "strainer" or "soup"; defaults to PHOTO_PARSER
+        
+    Returns:
+        The img src attribute if found, None otherwise
+    """
+    parser = parser or PHOTO_PARSER
+    if parser == 'soup':
+        return _soup_photo_src(BeautifulSoup(html, 'html.parser'))
+    if parser == 'strainer':
+        soup = BeautifulSoup(html, _strainer_parser(), parse_only=SoupStrainer('img'))
+        return _soup_photo_src(soup)
+    if parser != 'fast':
+        raise ValueError(f"Unknown PHOTO_PARSER {parser!r}")
+    
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    scanner = _PhotoImgScanner()
+    try:
+        scanner.feed(html)
+        scanner.close()
+    except _PhotoImgScanner.Found:
+        pass
+    photo_img = scanner.exact or scanner.fallback
+    return photo_img.get('src') if photo_img else None
+
 def scrape_photo_url(wrestler_id: int) -> str:
     """
     Scrape the rikishi photo URL from the sumo.or.jp website.
@@ -50,24 +259,15 @@ def scrape_photo_url(wrestler_id: int) -> str:
     url = f"{BASE_URL}/{wrestler_id}"
     
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        photo_url = extract_photo_src(response.content)
         
-        # Look for the photo image element
-        # The photo is typically in an img tag with class 'rikishi_photo' or similar
-        photo_img = soup.find('img', class_='rikishi_photo')
-        
-        if not photo_img:
-            # Try alternative selectors
-            photo_img = soup.find('img', class_=lambda x: x and 'photo' in x.lower())
-        
-        if photo_img and photo_img.get('src'):
-            photo_url = photo_img['src']
+        if photo_url:
             # Handle relative URLs
             if photo_url.startswith('/'):
-                photo_url = urljoin("https://www.sumo.or.jp", photo_url)
+                photo_url = urljoin(SITE_URL, photo_url)
             elif not photo_url.startswith('http'):
                 photo_url = urljoin(url, photo_url)
             return photo_url
@@ -79,32 +279,156 @@ def scrape_photo_url(wrestler_id: int) -> str:
         print(f"Error fetching profile for wrestler ID {wrestler_id}: {e}")
         return None
 
-def download_photo(wrestler_id: int, photo_url: str) -> bool:
+def download_photo(wrestler_id: int, photo_url: str, entry: Optional[dict] = None) -> bool:
     """
     Download a photo and save it with the wrestler ID as filename.
     
+    If a manifest entry is given and it holds ETag/Last-Modified validators
+    for the same URL, the request is made conditional and a 304 leaves the
+    file on disk untouched. Fresh validators are stored back into the entry.
+    
     Args:
         wrestler_id: The wrestler's ID number
         photo_url: The URL of the photo to download
+        entry: The wrestler's photo manifest entry, if any
         
     Returns:
-        True if successful, False otherwise
+        True if successful (including not modified), False otherwise
     """
+    filename = photo_path(wrestler_id)
+    headers = {}
+    if entry and entry.get('url') == photo_url and os.path.exists(filename):
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    
+    tmp_name = None
     try:
-        response = requests.get(photo_url, timeout=10)
-        response.raise_for_status()
+        with http_client.get(photo_url, headers=headers, stream=True) as response:
+            if response.status_code == 304:
+                print(f"Photo for wrestler ID {wrestler_id} not modified")
+                return True
+            response.raise_for_status()
+            
+            content_type = response.headers.get('Content-Type', '')
+            if not content_type.startswith('image/'):
+                raise ValueError(f"unexpected Content-Type {content_type!r}")
+            
+            # Stream into a temp file beside the target so the final rename
+            # is atomic and an interrupted run never leaves a truncated photo
+            digest = hashlib.sha256()
+            size = 0
+            with tempfile.NamedTemporaryFile(dir=IMAGES_DIR, prefix=f".{wrestler_id}.",
+                                             suffix='.part', delete=False) as tmp:
+                tmp_name = tmp.name
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MAX_PHOTO_BYTES:
+                        raise ValueError(f"photo larger than {MAX_PHOTO_BYTES} bytes")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            
+            expected = response.headers.get('Content-Length')
+            if expected and expected.isdigit() and 'Content-Encoding' not in response.headers \
+                    and int(expected) != size:
+                raise ValueError(f"truncated body ({size} of {expected} bytes)")
+            if size < MIN_PHOTO_BYTES:
+                raise ValueError(f"photo only {size} bytes")
+            
+            if entry is not None:
+                for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified')):
+                    if response.headers.get(header):
+                        entry[key] = response.headers[header]
+                    else:
+                        entry.pop(key, None)
         
-        # Save the image
-        filename = os.path.join(IMAGES_DIR, f"{wrestler_id}.jpg")
-        with open(filename, 'wb') as f:
-            f.write(response.content)
+        # Save the image, leaving identical files alone
+        if os.path.exists(filename) and digest.hexdigest() == file_sha256(filename):
+            print(f"Photo for wrestler ID {wrestler_id} unchanged")
+            return True
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, filename)
+        tmp_name = None
         
         print(f"Downloaded photo for wrestler ID {wrestler_id}")
         return True
         
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError, OSError) as e:
         print(f"Error downloading photo for wrestler ID {wrestler_id}: {e}")
         return False
+    finally:
+        if tmp_name and os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+def sync_photos(wrestler_ids: Set[int], manifest: dict, full: bool = False,
+                refresh_after: Optional[timedelta] = None) -> Tuple[Dict[str, int], int]:
+    """
+    Fetch profiles and download photos for every wrestler that needs it.
+    
+    Profile pages are fetched and parsed on one thread pool; as each photo
+    URL becomes available its download is queued on a second pool, so the
+    two stages overlap. The manifest is only updated from this thread.
+    
+    Args:
+        wrestler_ids: The wrestler ID numbers to sync
+        manifest: The photo manifest, updated in place
+        full: Re-fetch every photo regardless of what is on disk
+        refresh_after: Re-check entries last checked longer ago than this
+        
+    Returns:
+        A (counts, failed) tuple; counts has skipped/new/updated/unchanged
+    """
+    counts = {'skipped': 0, 'new': 0, 'updated': 0, 'unchanged': 0}
+    failed = 0
+    
+    pending = {}
+    for wrestler_id in sorted(wrestler_ids):
+        reason = needs_sync(manifest, wrestler_id, full, refresh_after)
+        if reason is None:
+            counts['skipped'] += 1
+            continue
+        entry = manifest.setdefault(str(wrestler_id), {})
+        pending[wrestler_id] = (reason, entry.get('sha256') if reason == 'updated' else None)
+    
+    if not pending:
+        return counts, failed
+    
+    def finish(wrestler_id, photo_url, ok):
+        nonlocal failed
+        reason, previous_sha = pending[wrestler_id]
+        entry = manifest[str(wrestler_id)]
+        if ok:
+            record_photo(manifest, wrestler_id, photo_url)
+            if previous_sha and entry['sha256'] == previous_sha:
+                counts['unchanged'] += 1
+            else:
+                counts[reason] += 1
+        else:
+            if not entry:
+                del manifest[str(wrestler_id)]
+            failed += 1
+    
+    with ThreadPoolExecutor(max_workers=max(1, PROFILE_WORKERS)) as profile_pool, \
+            ThreadPoolExecutor(max_workers=max(1, DOWNLOAD_WORKERS)) as download_pool:
+        profiles = {profile_pool.submit(scrape_photo_url, wrestler_id): wrestler_id
+                    for wrestler_id in pending}
+        downloads = {}
+        for future in as_completed(profiles):
+            wrestler_id = profiles[future]
+            photo_url = future.result()
+            if not photo_url:
+                finish(wrestler_id, None, False)
+                continue
+            entry = manifest[str(wrestler_id)]
+            download = download_pool.submit(download_photo, wrestler_id, photo_url, entry)
+            downloads[download] = (wrestler_id, photo_url)
+        
+        for future in as_completed(downloads):
+            wrestler_id, photo_url = downloads[future]
+            finish(wrestler_id, photo_url, future.result())
+    
+    return counts, failed
 
 def main():
     """Main execution function."""
@@ -113,26 +437,42 @@ def main():
     # Create images directory
     create_images_directory()
     
-    # Extract wrestler IDs from matches.json
-    wrestler_ids = extract_wrestler_ids()
+    # Extract wrestler IDs from matches.json, plus the whole banzuke so
+    # every photo for the tournament is fetched in one pass
+    match_ids = extract_wrestler_ids()
+    wrestler_ids = set(match_ids)
+    if os.environ.get('PHOTO_SOURCE', 'banzuke').lower() != 'matches':
+        basho = os.environ.get('BANZUKE') or scrape_sumo.get_current_basho_and_day()[0]
+        divisions = scrape_sumo.normalize_divisions(
+            os.environ.get('DIVISIONS', scrape_sumo.DEFAULT_DIVISION).split(','))
+        wrestler_ids |= extract_banzuke_ids(basho, divisions)
     
-    # Scrape and download photos for each wrestler
-    successful = 0
-    failed = 0
+    full = os.environ.get('PHOTO_SYNC', '').lower() == 'full'
+    refresh_days = os.environ.get('PHOTO_REFRESH_DAYS')
+    refresh_after = timedelta(days=float(refresh_days)) if refresh_days else None
+    manifest = load_manifest()
     
-    for wrestler_id in sorted(wrestler_ids):
-        photo_url = scrape_photo_url(wrestler_id)
-        if photo_url:
-            if download_photo(wrestler_id, photo_url):
-                successful += 1
-            else:
-                failed += 1
-        else:
-            failed += 1
+    # Scrape and download photos for each wrestler that needs it
+    counts, failed = sync_photos(wrestler_ids, manifest, full, refresh_after)
+    
+    save_manifest(manifest)
+    
+    # Resized/recompressed variants for the page's srcset
+    variants = photo_variants.update_variants(wrestler_ids)
+    # One sprite sheet with every face in today's bouts
+    sprite_written = photo_variants.update_sprite(match_ids)
     
     print(f"\nScraping complete!")
-    print(f"Successfully downloaded: {successful}")
+    print(f"Skipped (up to date): {counts['skipped']}")
+    print(f"New: {counts['new']}")
+    print(f"Updated: {counts['updated']}")
+    print(f"Re-checked, unchanged: {counts['unchanged']}")
+    print(f"Successfully downloaded: {counts['new'] + counts['updated']}")
     print(f"Failed: {failed}")
+    print(f"Photo variants generated: {variants['generated']}, up to date: {variants['skipped']}")
+    print(f"Photo sprite: {'rewritten' if sprite_written else 'up to date'}")
+    
+    http_client.write_run_report("scrape_rikishi_photos")
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,41 @@
-import requests
+import argparse
+import gzip
+import hashlib
 import json
 import os
+import re
 from datetime import datetime, timedelta
 import zoneinfo  # Python 3.9+
 import calendar
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bout_stats
+import bout_store
+import http_client
+import rikishi_cache
+
+# Threads used to resolve rikishi concurrently; requests in flight to
+# sumo-api.com are further capped per host by http_client
+RESOLVE_WORKERS = int(os.environ.get('RESOLVE_WORKERS', 8))
+API_BASE = os.environ.get('SUMO_API_BASE', 'https://www.sumo-api.com/api').rstrip('/')
+# Page size for the bulk /rikishis listing (the API caps it at 1000)
+RIKISHI_PAGE_SIZE = 1000
+DIVISIONS = ('Makuuchi', 'Juryo', 'Makushita', 'Sandanme', 'Jonidan', 'Jonokuchi')
+DEFAULT_DIVISION = 'Makuuchi'
+# How bout files are written: "pretty" (indent=2), "minified" or "columnar"
+# (minified parallel arrays); PRECOMPRESS=1 also writes .gz/.br siblings
+OUTPUT_FORMAT = os.environ.get('OUTPUT_FORMAT', 'pretty')
+PRECOMPRESS = os.environ.get('PRECOMPRESS', '') not in ('', '0')
+# HASHED_OUTPUT=1 also publishes matches files as immutable
+# matches.<hash>.json copies named by matches.manifest.json
+HASHED_OUTPUT = os.environ.get('HASHED_OUTPUT', '') not in ('', '0')
+# Hashes of the last torikumi payload written for each (basho, day, division)
+STATE_FILE = 'scrape_state.json'
+# Static JSON tree for the page, exported from the bout store:
+# BACKFILL_DIR/index.json, {basho}/index.json, {basho}/{day}.json and
+# rikishi/{id}.json
+BACKFILL_DIR = 'data'
 
 def get_current_basho_and_day():
     """Return the current basho (banzuke) and day based on Japan's date."""
@@ -48,26 +80,120 @@ def second_sunday(year, month):
                if day.weekday() == 6 and day.month == month]
     return sundays[1]
 
-def get_nskid_for_wrestler(wrestler_id):
-    """Fetch nskId for a wrestler from the rikishi API."""
+def get_nskid_for_wrestler(wrestler_id, cache=None):
+    """Fetch nskId for a wrestler from the rikishi API.
+
+    If a rikishi cache is given, a fresh cached entry is returned without
+    hitting the API, and successful lookups (the whole rikishi record) are
+    stored back into it.
+    """
+    if cache is not None:
+        hit, nsk_id = rikishi_cache.get_cached_nskid(cache, wrestler_id)
+        if hit:
+            return nsk_id
+
     try:
-        url = f"https://www.sumo-api.com/api/rikishi/{wrestler_id}"
-        response = requests.get(url)
+        url = f"{API_BASE}/rikishi/{wrestler_id}"
+        response = http_client.get(url)
         response.raise_for_status()
         data = response.json()
-        return data.get("nskId")
+        nsk_id = data.get("nskId")
     except Exception as e:
         print(f"Warning: Could not fetch nskId for wrestler {wrestler_id}: {e}")
         return None
 
-def scrape_sumo_bouts(basho=None, day=None):
-    """Fetch sumo bouts from the sumo-api.com API."""
-    if not basho or not day:
-        raise ValueError("basho and day parameters are required")
-    
-    base_url = f"https://www.sumo-api.com/api/basho/{basho}/torikumi/Makuuchi/{day}"
+    if cache is not None:
+        rikishi_cache.store_rikishi(cache, wrestler_id, data)
+    return nsk_id
+
+def prefetch_rikishi_index(cache):
+    """Load the record of every active rikishi via the bulk /rikishis listing.
+
+    Returns the number of rikishi added to the cache.
+    """
+    added = 0
+    skip = 0
+    while True:
+        url = f"{API_BASE}/rikishis?limit={RIKISHI_PAGE_SIZE}&skip={skip}"
+        response = http_client.get(url)
+        response.raise_for_status()
+        data = response.json()
+
+        records = data.get("records") or []
+        for record in records:
+            if record.get("id"):
+                rikishi_cache.store_rikishi(cache, record["id"], record)
+                added += 1
+
+        skip += len(records)
+        if not records or skip >= data.get("total", 0):
+            return added
+
+def resolve_rikishi_ids(wrestler_ids, cache=None, max_workers=None, basho=None):
+    """Resolve each distinct wrestler ID to its nskId exactly once.
+
+    When basho is given and some IDs are not cached, the whole rikishi
+    listing is bulk-loaded once for that basho (unless RIKISHI_PREFETCH=0)
+    before falling back to single lookups for whatever is still missing.
+
+    Lookups run concurrently on a bounded thread pool; the returned table
+    is keyed by wrestler ID, so callers see the same result regardless of
+    the order in which requests complete.
+    """
+    distinct = list(dict.fromkeys(i for i in wrestler_ids if i))
+    if not distinct:
+        return {}
+    if cache is None:
+        cache = rikishi_cache.new_cache()
+
+    misses = [i for i in distinct if not rikishi_cache.get_cached_nskid(cache, i)[0]]
+    if (misses and basho and os.environ.get('RIKISHI_PREFETCH', '1') != '0'
+            and not rikishi_cache.was_prefetched(cache, basho)):
+        try:
+            added = prefetch_rikishi_index(cache)
+            rikishi_cache.mark_prefetched(cache, basho)
+            print(f"Prefetched {added} rikishi for basho {basho}")
+        except Exception as e:
+            print(f"Warning: Bulk rikishi prefetch failed, using single lookups: {e}")
+
+    workers = max(1, min(max_workers or RESOLVE_WORKERS, len(distinct)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        nsk_ids = pool.map(lambda i: get_nskid_for_wrestler(i, cache), distinct)
+        return dict(zip(distinct, nsk_ids))
+
+def save_rikishi_cache(cache):
+    """Save the rikishi cache and refresh the rikishi.json profiles it feeds."""
+    rikishi_cache.save_cache(cache)
+    rikishi_cache.export_profiles(cache)
+
+def normalize_divisions(names):
+    """Map division names (any case, or "all") to their canonical spelling.
+
+    Blank names are skipped, and no names at all means Makuuchi only.
+    """
+    canonical = {d.lower(): d for d in DIVISIONS}
+    divisions = []
+    for name in names:
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name == 'all':
+            return list(DIVISIONS)
+        if name not in canonical:
+            raise ValueError(f"Unknown division {name!r}, expected one of {', '.join(DIVISIONS)}")
+        if canonical[name] not in divisions:
+            divisions.append(canonical[name])
+    return divisions or [DEFAULT_DIVISION]
+
+def division_suffix(division):
+    """Return the output filename suffix for a division ('' for Makuuchi)."""
+    return '' if division == DEFAULT_DIVISION else f"_{division.lower()}"
+
+def fetch_torikumi(basho, day, division=DEFAULT_DIVISION):
+    """Fetch the raw torikumi (list of bout payloads) for a division and day."""
+    base_url = f"{API_BASE}/basho/{basho}/torikumi/{division}/{day}"
     
-    response = requests.get(base_url)
+    response = http_client.get(base_url)
     response.raise_for_status()
     
     data = response.json()
@@ -80,6 +206,30 @@ def scrape_sumo_bouts(basho=None, day=None):
     if not isinstance(bouts_data, list):
         raise ValueError(f"Expected 'torikumi' to be a list, got {type(bouts_data)}")
     
+    return bouts_data
+
+def fetch_banzuke(basho, division=DEFAULT_DIVISION):
+    """Fetch the sumo-api rikishi IDs ranked in a division's banzuke."""
+    response = http_client.get(f"{API_BASE}/basho/{basho}/banzuke/{division}")
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, dict):
+        raise ValueError(f"Unexpected API response format: expected dict, got {type(data)}")
+    
+    return [entry["rikishiID"] for side in ("east", "west")
+            for entry in data.get(side) or [] if entry.get("rikishiID")]
+
+def collect_rikishi_ids(bouts_data):
+    """Return every east/west/winner ID referenced by a torikumi."""
+    # The winner is always one of the east/west pair, so it never costs an
+    # extra lookup once the IDs are deduplicated
+    wrestler_ids = []
+    for bout in bouts_data:
+        wrestler_ids.extend([bout.get("eastId"), bout.get("westId"), bout.get("winnerId")])
+    return wrestler_ids
+
+def build_bouts(bouts_data, nsk_ids):
+    """Build matches.json bout dicts from a torikumi and a resolved ID table."""
     bouts = []
     for bout in bouts_data:
         east_id = bout.get("eastId")
@@ -89,28 +239,560 @@ def scrape_sumo_bouts(basho=None, day=None):
         bouts.append({
             "east": {
                 "name": bout.get("eastShikona", ""),
-                "id": get_nskid_for_wrestler(east_id)
+                "id": nsk_ids.get(east_id)
             },
             "west": {
                 "name": bout.get("westShikona", ""),
-                "id": get_nskid_for_wrestler(west_id)
+                "id": nsk_ids.get(west_id)
             },
             "kimarite": bout.get("kimarite", None) or None,
-            "winner": get_nskid_for_wrestler(winner_id) if winner_id else None
+            "winner": nsk_ids.get(winner_id) if winner_id else None
         })
     
     return bouts
 
-def main():
+def scrape_sumo_bouts(basho=None, day=None, cache=None, division=DEFAULT_DIVISION):
+    """Fetch sumo bouts from the sumo-api.com API."""
+    if not basho or not day:
+        raise ValueError("basho and day parameters are required")
+    
+    bouts_data = fetch_torikumi(basho, day, division)
+    nsk_ids = resolve_rikishi_ids(collect_rikishi_ids(bouts_data), cache, basho=basho)
+    return build_bouts(bouts_data, nsk_ids)
+
+def basho_range(first, last):
+    """Return every basho code from first to last inclusive (odd months only)."""
+    year, month = int(first[:4]), int(first[4:])
+    if month % 2 == 0:
+        month += 1
+    codes = []
+    while f"{year}{month:02d}" <= last:
+        codes.append(f"{year}{month:02d}")
+        month += 2
+        if month > 12:
+            year, month = year + 1, 1
+    return codes
+
+def fetch_torikumi_many(keys, max_workers=None):
+    """Fetch (basho, day, division) torikumi in parallel.
+    
+    Returns a dict mapping each key to its bout payloads; keys that could
+    not be fetched (or have no bouts) are left out.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    
+    def fetch(key):
+        try:
+            return fetch_torikumi(*key)
+        except Exception as e:
+            print(f"Warning: Could not fetch {key[2]} torikumi for {key[0]} day {key[1]}: {e}")
+            return None
+    
+    workers = max(1, min(max_workers or RESOLVE_WORKERS, len(keys)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        torikumi = dict(zip(keys, pool.map(fetch, keys)))
+    return {key: bouts_data for key, bouts_data in torikumi.items() if bouts_data}
+
+def build_torikumi(torikumi, cache=None, max_workers=None):
+    """Resolve every rikishi across many torikumi once and build their bouts."""
+    if not torikumi:
+        return {}
+    wrestler_ids = []
+    for bouts_data in torikumi.values():
+        wrestler_ids.extend(collect_rikishi_ids(bouts_data))
+    latest_basho = max(key[0] for key in torikumi)
+    nsk_ids = resolve_rikishi_ids(wrestler_ids, cache, max_workers, basho=latest_basho)
+    
+    return {key: build_bouts(bouts_data, nsk_ids) for key, bouts_data in torikumi.items()}
+
+def canonical_hash(data):
+    """Return a SHA-256 of data's canonical JSON form (sorted keys, no whitespace)."""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def load_state(path=STATE_FILE):
+    """Load the change-detection state, or an empty one.
+    
+    "torikumi" maps each (basho, day, division) key to the hash of the
+    payload last written for it, "files" maps each matches file to the
+    key it currently holds, and "output" holds the output_settings the
+    files were written with.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read {path}, treating every torikumi as changed: {e}")
+        state = {}
+    state.setdefault("torikumi", {})
+    state.setdefault("files", {})
+    return state
+
+def save_state(state, path=STATE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+def state_key(basho, day, division):
+    return f"{basho}/{day}/{division}"
+
+def output_settings():
+    """The settings that shape written files; changing any of them forces a rewrite."""
+    return {"format": OUTPUT_FORMAT, "precompress": PRECOMPRESS, "hashed": HASHED_OUTPUT}
+
+def is_unchanged(state, key, payload_hash, output_file):
+    """True if output_file already holds the torikumi with this payload hash,
+    written with the current output settings."""
+    return (state["torikumi"].get(state_key(*key)) == payload_hash
+            and state["files"].get(output_file) == state_key(*key)
+            and state.get("output") == output_settings()
+            and os.path.exists(output_file))
+
+def bouts_resolved(bouts):
+    """True if every east/west rikishi in bouts resolved to an nskId."""
+    return all(bout["east"]["id"] is not None and bout["west"]["id"] is not None for bout in bouts)
+
+def record_state(state, key, payload_hash, output_file, bouts):
+    """Record that output_file holds this torikumi.
+    
+    If any rikishi failed to resolve, the file is forgotten instead so the
+    next run treats the torikumi as changed and retries the lookups.
+    """
+    if not bouts_resolved(bouts):
+        state["files"].pop(output_file, None)
+        print(f"Warning: {output_file} has unresolved rikishi, will retry on the next run")
+        return
+    state["torikumi"][state_key(*key)] = payload_hash
+    state["files"][output_file] = state_key(*key)
+    state["output"] = output_settings()
+
+def columnar_bouts(bouts):
+    """Lay a bout list out as parallel arrays, one per field."""
+    return {
+        "format": "columnar",
+        "east": {"name": [b["east"]["name"] for b in bouts], "id": [b["east"]["id"] for b in bouts]},
+        "west": {"name": [b["west"]["name"] for b in bouts], "id": [b["west"]["id"] for b in bouts]},
+        "kimarite": [b["kimarite"] for b in bouts],
+        "winner": [b["winner"] for b in bouts],
+    }
+
+def expand_bouts(data):
+    """Turn either file layout (bout list or columnar) back into a bout list."""
+    if isinstance(data, list) or data.get("format") != "columnar":
+        return data
+    return [
+        {
+            "east": {"name": data["east"]["name"][i], "id": data["east"]["id"][i]},
+            "west": {"name": data["west"]["name"][i], "id": data["west"]["id"][i]},
+            "kimarite": kimarite,
+            "winner": data["winner"][i],
+        }
+        for i, kimarite in enumerate(data["kimarite"])
+    ]
+
+def serialize_bouts(bouts, output_format=None):
+    """Serialize a bout list in the given (or configured) output format."""
+    output_format = output_format or OUTPUT_FORMAT
+    if output_format == 'pretty':
+        return json.dumps(bouts, indent=2, ensure_ascii=False).encode('utf-8')
+    if output_format == 'minified':
+        return json.dumps(bouts, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if output_format == 'columnar':
+        return json.dumps(columnar_bouts(bouts), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    raise ValueError(f"Unknown OUTPUT_FORMAT {output_format!r}, expected pretty, minified or columnar")
+
+def write_compressed_siblings(output_file, data):
+    """Write .gz (and .br, if brotli is installed) copies of data next to output_file."""
+    # mtime=0 keeps the gzip bytes stable so unchanged data never shows up as a diff
+    with open(f"{output_file}.gz", 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(f"{output_file}.br", 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+
+def compressed_siblings(output_file):
+    """Return the compressed sibling paths write_compressed_siblings produces."""
+    siblings = [f"{output_file}.gz"]
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return siblings
+    return siblings + [f"{output_file}.br"]
+
+def sync_compressed_siblings(output_file, data, precompress):
+    """Write output_file's compressed siblings if precompress is on, else remove them."""
+    if precompress:
+        write_compressed_siblings(output_file, data)
+        return
+    for sibling in (f"{output_file}.gz", f"{output_file}.br"):
+        if os.path.exists(sibling):
+            os.remove(sibling)
+
+def is_written(output_file, data, precompress):
+    """Return True if output_file holds data with exactly the expected siblings.
+    
+    Siblings are expected when precompress is on and must be absent when it
+    is off, so toggling PRECOMPRESS rewrites otherwise unchanged files.
+    """
+    try:
+        with open(output_file, 'rb') as f:
+            if f.read() != data:
+                return False
+    except OSError:
+        return False
+    if precompress:
+        return all(os.path.exists(sibling) for sibling in compressed_siblings(output_file))
+    return not any(os.path.exists(sibling) for sibling in (f"{output_file}.gz", f"{output_file}.br"))
+
+def write_bouts_if_changed(bouts, output_file, output_format=None, precompress=None):
+    """Write bouts unless output_file (and its siblings) already hold exactly the same bytes.
+    
+    Returns True if the file was (re)written.
+    """
+    precompress = PRECOMPRESS if precompress is None else precompress
+    if is_written(output_file, serialize_bouts(bouts, output_format), precompress):
+        return False
+    write_bouts(bouts, output_file, output_format, precompress)
+    return True
+
+def write_bouts(bouts, output_file, output_format=None, precompress=None):
+    """Write a bout list as matches.json-style JSON, creating parent directories."""
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = serialize_bouts(bouts, output_format)
+    with open(output_file, 'wb') as f:
+        f.write(data)
+    sync_compressed_siblings(output_file, data, PRECOMPRESS if precompress is None else precompress)
+
+def store_bouts(store, key, bouts):
+    """Upsert a (basho, day, division) torikumi into the bout store.
+    
+    Returns the day's bouts as exported back from the store.
+    """
+    bout_store.upsert_bouts(store, *key, bouts)
+    return bout_store.load_bouts(store, *key)
+
+def day_shard_file(output_dir, basho, day, division):
+    """Return the static shard path of one day's bouts for a division."""
+    return os.path.join(output_dir, basho, f"{day}{division_suffix(division)}.json")
+
+def write_json_if_changed(payload, output_file):
+    """Write payload as minified JSON unless output_file already holds it.
+    
+    Returns True if the file was (re)written.
+    """
+    data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if is_written(output_file, data, PRECOMPRESS):
+        return False
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_file, 'wb') as f:
+        f.write(data)
+    sync_compressed_siblings(output_file, data, PRECOMPRESS)
+    return True
+
+def rikishi_shard(store, wrestler_id):
+    """Build a rikishi's shard: every stored bout, oldest first, as compact rows."""
+    name = None
+    rows = []
+    for bout in bout_store.rikishi_bouts(store, wrestler_id):
+        east = bout["east_id"] == wrestler_id
+        name = bout["east_name"] if east else bout["west_name"]
+        result = None
+        if bout["winner"] is not None:
+            result = "W" if bout["winner"] == wrestler_id else "L"
+        rows.append([bout["basho"], bout["day"], bout["division"],
+                     bout["west_id"] if east else bout["east_id"],
+                     bout["west_name"] if east else bout["east_name"],
+                     result, bout["kimarite"]])
+    return {
+        "id": wrestler_id,
+        "name": name,
+        "fields": ["basho", "day", "division", "opponent", "opponentName", "result", "kimarite"],
+        "bouts": rows,
+    }
+
+def export_shards(store, keys, output_dir=BACKFILL_DIR):
+    """Export the static JSON tree touched by some (basho, day, division) keys.
+    
+    Writes each key's day shard, the index of every basho involved, the
+    top-level basho index and the shard of every rikishi in those days,
+    all from the bout store. Unchanged files are left alone.
+    
+    Returns the list of day shards that were (re)written.
+    """
+    written = []
+    wrestler_ids = set()
+    for key in sorted(keys):
+        bouts = bout_store.load_bouts(store, *key)
+        output_file = day_shard_file(output_dir, *key)
+        if write_bouts_if_changed(bouts, output_file):
+            written.append(output_file)
+        for bout in bouts:
+            wrestler_ids.update(i for i in (bout["east"]["id"], bout["west"]["id"]) if i is not None)
+    
+    stored = bout_store.stored_days(store)
+    for basho in sorted({key[0] for key in keys}):
+        days = {}
+        for stored_basho, day, division in stored:
+            if stored_basho == basho:
+                days.setdefault(division, []).append(day)
+        write_json_if_changed({"basho": basho, "days": days},
+                              os.path.join(output_dir, basho, "index.json"))
+    write_json_if_changed({"basho": sorted({key[0] for key in stored}, reverse=True)},
+                          os.path.join(output_dir, "index.json"))
+    
+    for wrestler_id in sorted(wrestler_ids):
+        write_json_if_changed(rikishi_shard(store, wrestler_id),
+                              os.path.join(output_dir, "rikishi", f"{wrestler_id}.json"))
+    return written
+
+def backfill(first_basho, last_basho, days, cache, output_dir=BACKFILL_DIR,
+             divisions=(DEFAULT_DIVISION,), store=None, state=None, force=False):
+    """Scrape every requested day of a basho range and write per-day files.
+    
+    Bouts are upserted into the bout store (if given) and the files
+    exported from it. With a change-detection state, days whose torikumi
+    is unchanged since their file was written are skipped (unless force)
+    and the state is updated for the rest.
+    
+    Returns the number of torikumi fetched.
+    """
+    basho_days = [(basho, day) for basho in basho_range(first_basho, last_basho) for day in days]
+    print(f"Backfilling {len(basho_days)} days of {', '.join(divisions)} "
+          f"from {first_basho} to {last_basho}")
+    
+    keys = [(basho, day, division) for basho, day in basho_days for division in divisions]
+    torikumi = fetch_torikumi_many(keys)
+    payload_hashes = {key: canonical_hash(bouts_data) for key, bouts_data in torikumi.items()}
+    changed = {
+        key: bouts_data for key, bouts_data in torikumi.items()
+        if force or state is None
+        or not is_unchanged(state, key, payload_hashes[key], day_shard_file(output_dir, *key))
+    }
+    if len(changed) < len(torikumi):
+        print(f"Skipping {len(torikumi) - len(changed)} unchanged torikumi")
+    
+    results = build_torikumi(changed, cache)
+    if store is not None:
+        for key, bouts in results.items():
+            bout_store.upsert_bouts(store, *key, bouts)
+        for output_file in export_shards(store, results, output_dir):
+            print(f"Saved {output_file}")
+    else:
+        for key, bouts in sorted(results.items()):
+            output_file = day_shard_file(output_dir, *key)
+            if write_bouts_if_changed(bouts, output_file):
+                print(f"Saved {len(bouts)} bouts to {output_file}")
+    
+    if state is not None:
+        for key, bouts in results.items():
+            record_state(state, key, payload_hashes[key], day_shard_file(output_dir, *key), bouts)
+    return len(torikumi)
+
+def matches_file(division):
+    """Return the single-day output file for a division."""
+    return f"matches{division_suffix(division)}.json"
+
+def stats_file(division):
+    """Return the per-bout stats file shown next to a division's matches."""
+    return f"matches{division_suffix(division)}.stats.json"
+
+def publish_hashed_copy(output_file, data):
+    """Publish data as an immutable <stem>.<hash>.json plus a small manifest.
+    
+    The manifest (<stem>.manifest.json) names the current hashed file so the
+    page can revalidate only the manifest and cache the payload forever.
+    The hashed file the manifest pointed to before is kept for clients that
+    fetched the old manifest; anything older is removed.
+    
+    Returns True if anything was written.
+    """
+    stem = output_file[:-len('.json')]
+    digest = hashlib.sha256(data).hexdigest()
+    hashed_file = f"{stem}.{digest[:12]}.json"
+    manifest_file = f"{stem}.manifest.json"
+    manifest = {"file": os.path.basename(hashed_file), "sha256": digest,
+                "bouts": len(expand_bouts(json.loads(data)))}
+    
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    if previous == manifest and is_written(hashed_file, data, PRECOMPRESS):
+        return False
+    
+    with open(hashed_file, 'wb') as f:
+        f.write(data)
+    sync_compressed_siblings(hashed_file, data, PRECOMPRESS)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+        f.write("\n")
+    
+    remove_hashed_copies(output_file, keep={manifest["file"], previous.get("file")})
+    return True
+
+def remove_hashed_copies(output_file, keep=()):
+    """Remove an output file's hashed copies (and siblings) not named in keep.
+    
+    With nothing kept the manifest goes too, so the page falls back to the
+    plain output file instead of a stale copy.
+    """
+    stem = output_file[:-len('.json')]
+    directory = os.path.dirname(output_file) or '.'
+    pattern = re.compile(re.escape(os.path.basename(stem)) + r"\.[0-9a-f]{12}\.json")
+    for name in os.listdir(directory):
+        base = re.sub(r"\.(gz|br)$", "", name)
+        if pattern.fullmatch(base) and base not in keep:
+            os.remove(os.path.join(directory, name))
+    if not keep and os.path.exists(f"{stem}.manifest.json"):
+        os.remove(f"{stem}.manifest.json")
+
+def publish_matches(bouts, division):
+    """Write a division's matches file (and its hashed copy, if enabled).
+    
+    Returns True if the matches file itself was rewritten.
+    """
+    output_file = matches_file(division)
+    changed = write_bouts_if_changed(bouts, output_file)
+    if HASHED_OUTPUT:
+        publish_hashed_copy(output_file, serialize_bouts(bouts))
+    else:
+        remove_hashed_copies(output_file)
+    return changed
+
+def bout_signature(bout):
+    """The fields of a torikumi bout whose change requires rebuilding it."""
+    return (bout.get("eastId"), bout.get("westId"), bout.get("winnerId"), bout.get("kimarite"))
+
+def apply_bout_changes(previous_data, bouts_data, bouts, cache=None, basho=None):
+    """Rebuild only the bouts whose signature changed since previous_data.
+    
+    bouts is updated in place. Returns the number of bouts rebuilt.
+    """
+    if len(previous_data) != len(bouts_data) or len(bouts) != len(bouts_data):
+        nsk_ids = resolve_rikishi_ids(collect_rikishi_ids(bouts_data), cache, basho=basho)
+        bouts[:] = build_bouts(bouts_data, nsk_ids)
+        return len(bouts)
+    
+    changed = [i for i, (old, new) in enumerate(zip(previous_data, bouts_data))
+               if bout_signature(old) != bout_signature(new)]
+    if not changed:
+        return 0
+    
+    changed_data = [bouts_data[i] for i in changed]
+    nsk_ids = resolve_rikishi_ids(collect_rikishi_ids(changed_data), cache, basho=basho)
+    for i, bout in zip(changed, build_bouts(changed_data, nsk_ids)):
+        bouts[i] = bout
+    return len(changed)
+
+def watch(basho, day, divisions, cache, min_interval=30, max_interval=600, max_hours=8.0,
+          store=None):
+    """Poll a day's torikumi and rewrite the matches files as results come in.
+    
+    The poll interval drops to min_interval whenever a bout changes and
+    doubles (up to max_interval) while nothing does; before any bout has
+    been decided it stays at max_interval. Watching stops once every bout
+    has a winner or after max_hours.
+    """
+    keys = [(basho, day, division) for division in divisions]
+    state = load_state()
+    payloads = {}
+    results = {}
+    deadline = time.monotonic() + max_hours * 3600
+    interval = min_interval
+    
+    while True:
+        torikumi = fetch_torikumi_many(keys)
+        changes = 0
+        for key, bouts_data in torikumi.items():
+            if key in payloads:
+                changed = apply_bout_changes(payloads[key], bouts_data, results[key], cache, basho)
+            else:
+                results[key] = build_torikumi({key: bouts_data}, cache)[key]
+                changed = len(bouts_data)
+            payloads[key] = bouts_data
+            
+            if changed:
+                changes += changed
+                bouts = store_bouts(store, key, results[key]) if store is not None else results[key]
+                if publish_matches(bouts, key[2]):
+                    print(f"Updated {matches_file(key[2])} ({changed} bouts changed)")
+                if store is not None:
+                    bout_stats.export_stats(store, *key, stats_file(key[2]))
+                    export_shards(store, [key])
+                record_state(state, key, canonical_hash(bouts_data), matches_file(key[2]), bouts)
+        if changes:
+            save_rikishi_cache(cache)
+            save_state(state)
+        
+        all_bouts = [bout for bouts_data in payloads.values() for bout in bouts_data]
+        decided = sum(1 for bout in all_bouts if bout.get("winnerId"))
+        if all_bouts and decided == len(all_bouts) and len(payloads) == len(keys):
+            print(f"All {decided} bouts decided, stopping watch")
+            return
+        if time.monotonic() + interval > deadline:
+            print(f"Watch time limit of {max_hours}h reached with {decided}/{len(all_bouts)} decided")
+            return
+        
+        if changes:
+            interval = min_interval
+        elif decided == 0:
+            interval = max_interval
+        else:
+            interval = min(interval * 2, max_interval)
+        print(f"{decided}/{len(all_bouts)} bouts decided, next poll in {interval:g}s")
+        time.sleep(interval)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape sumo bouts from sumo-api.com")
+    parser.add_argument('--backfill', action='store_true',
+                        help="fetch every day of --basho (through --to-basho) into per-day files")
+    parser.add_argument('--basho', help="basho code YYYYMM (default: BANZUKE or current basho)")
+    parser.add_argument('--to-basho', help="last basho code of a backfill range (default: --basho)")
+    parser.add_argument('--days', default='1-15', help="day range for a backfill, e.g. 1-15 or 3-5")
+    parser.add_argument('--output-dir', default=BACKFILL_DIR, help="directory for backfill files")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep polling the day's torikumi and update matches files as results arrive")
+    parser.add_argument('--poll-min', type=float, default=30, help="fastest watch poll interval (s)")
+    parser.add_argument('--poll-max', type=float, default=600, help="slowest watch poll interval (s)")
+    parser.add_argument('--watch-hours', type=float, default=8, help="give up watching after this long")
+    parser.add_argument('--force', action='store_true',
+                        help="resolve and rewrite even if the torikumi has not changed")
+    parser.add_argument('--divisions', default=os.environ.get('DIVISIONS') or DEFAULT_DIVISION,
+                        help="comma-separated divisions to scrape, or 'all' (default: DIVISIONS "
+                             "or Makuuchi); non-Makuuchi output goes to matches_<division>.json")
+    return parser.parse_args(argv)
+
+def parse_day_range(text):
+    """Parse "N" or "N-M" into a list of day numbers."""
+    first, _, last = text.partition('-')
+    return list(range(int(first), int(last or first) + 1))
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Get parameters from environment variables (for GitHub Actions)
     # auto_banzuke, auto_day = get_current_basho_and_day()
-    basho = os.environ.get('BANZUKE')
+    basho = args.basho or os.environ.get('BANZUKE')
     day = os.environ.get('DAY')
-    if not basho or not day:
-        basho, day = get_current_basho_and_day()
+    if not basho or (not day and not args.backfill):
+        auto_basho, day = get_current_basho_and_day()
+        basho = basho or auto_basho
         print(f"incomplete basho data, using automatic")
         
-    print(f"Using banzuke {basho}, day {day}")
+    if not args.backfill:
+        print(f"Using banzuke {basho}, day {day}")
     # Convert day to integer if provided
     if day:
         try:
@@ -119,19 +801,80 @@ def main():
             day = None
             print("Warning: DAY environment variable is not a valid integer")
     
+    cache = rikishi_cache.load_cache()
+    # Comma-separated rikishi IDs to force a re-fetch for, or "all"
+    invalidate = os.environ.get('RIKISHI_CACHE_INVALIDATE', '').strip()
+    if invalidate == 'all':
+        rikishi_cache.invalidate(cache)
+    elif invalidate:
+        rikishi_cache.invalidate(cache, [i.strip() for i in invalidate.split(',') if i.strip()])
+
+    store = None
     try:
-        bouts = scrape_sumo_bouts(basho, day)
-        output_file = 'matches.json'
+        divisions = normalize_divisions(args.divisions.split(','))
+        store = bout_store.connect()
+        bout_stats.ensure_indexes(store)
+        if args.backfill:
+            state = load_state()
+            written = backfill(basho, args.to_basho or basho, parse_day_range(args.days),
+                               cache, args.output_dir, divisions, store, state, args.force)
+            save_rikishi_cache(cache)
+            save_state(state)
+            if not written:
+                raise RuntimeError("no torikumi could be fetched for the requested range")
+            print(f"Successfully backfilled {written} torikumi into {args.output_dir}")
+            return
+        
+        if not basho or not day:
+            raise ValueError("basho and day parameters are required")
+        
+        if args.watch:
+            watch(basho, day, divisions, cache, args.poll_min, args.poll_max, args.watch_hours, store)
+            return
+        
+        keys = [(basho, day, division) for division in divisions]
+        torikumi = fetch_torikumi_many(keys)
+        missing = [key[2] for key in keys if key not in torikumi]
+        if missing:
+            raise RuntimeError(f"could not fetch torikumi for {', '.join(missing)}")
+        
+        # Skip resolution entirely for torikumi whose payload is unchanged
+        # since the last run that wrote them
+        state = load_state()
+        payload_hashes = {key: canonical_hash(bouts_data) for key, bouts_data in torikumi.items()}
+        changed = {
+            key: bouts_data for key, bouts_data in torikumi.items()
+            if args.force or not is_unchanged(state, key, payload_hashes[key], matches_file(key[2]))
+        }
+        if not changed:
+            print("Torikumi unchanged since last run, nothing to do")
+            return
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(bouts, f, indent=2, ensure_ascii=False)
+        results = build_torikumi(changed, cache)
+        save_rikishi_cache(cache)
         
-        print(f"Successfully saved {len(bouts)} bouts to {output_file}")
+        for key, bouts in results.items():
+            output_file = matches_file(key[2])
+            # matches files are exported from the store, not the scrape
+            bouts = store_bouts(store, key, bouts)
+            
+            if publish_matches(bouts, key[2]):
+                print(f"Successfully saved {len(bouts)} bouts to {output_file}")
+            else:
+                print(f"{output_file} already up to date ({len(bouts)} bouts)")
+            bout_stats.export_stats(store, *key, stats_file(key[2]))
+            record_state(state, key, payload_hashes[key], output_file, bouts)
+        export_shards(store, results)
+        save_state(state)
         
     except Exception as e:
         print(f"Error: {e}")
         # Exit with error code to fail the workflow
         exit(1)
+    finally:
+        if store is not None:
+            store.close()
+        http_client.write_run_report("scrape_sumo")
 
 if __name__ == "__main__":
     main()
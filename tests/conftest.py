@@ -0,0 +1,46 @@
+"""Shared fixtures: the repo's modules and a stub sumo-api/sumo.or.jp server."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bench")]
+
+import scrape_rikishi_photos  # noqa: E402
+import scrape_sumo  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+
+@pytest.fixture
+def stub_server():
+    """A fixture-backed stub of sumo-api.com for one test."""
+    server = start_stub_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scrape_env(stub_server, tmp_path, monkeypatch):
+    """Point scrape_sumo at the stub server from an empty working directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scrape_sumo, "API_BASE", f"http://127.0.0.1:{stub_server.server_port}/api")
+    monkeypatch.setenv("BANZUKE", "202509")
+    monkeypatch.setenv("DAY", "2")
+    for name in ("RIKISHI_CACHE_INVALIDATE", "RIKISHI_CACHE_REFRESH", "RIKISHI_PREFETCH", "DIVISIONS"):
+        monkeypatch.delenv(name, raising=False)
+    return stub_server
+
+
+
+@pytest.fixture
+def photos_env(scrape_env, monkeypatch):
+    """Also point scrape_rikishi_photos at the stub's sumo.or.jp pages."""
+    site = f"http://127.0.0.1:{scrape_env.server_port}"
+    monkeypatch.setattr(scrape_rikishi_photos, "SITE_URL", site)
+    monkeypatch.setattr(scrape_rikishi_photos, "BASE_URL", f"{site}/EnSumoDataRikishi/profile")
+    for name in ("PHOTO_SOURCE", "PHOTO_SYNC", "PHOTO_REFRESH_DAYS", "PHOTO_AVIF"):
+        monkeypatch.delenv(name, raising=False)
+    return scrape_env
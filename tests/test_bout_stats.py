@@ -0,0 +1,99 @@
+"""The trigger-maintained aggregates and per-bout stats."""
+
+import pytest
+
+import bout_stats
+import bout_store
+
+
+def bout(east, west, winner=None, kimarite=None):
+    return {
+        "east": {"name": f"R{east}", "id": east},
+        "west": {"name": f"R{west}", "id": west},
+        "kimarite": kimarite,
+        "winner": winner,
+    }
+
+
+def aggregates(conn):
+    """Both aggregate tables, less the all-zero rows triggers leave behind."""
+    return (
+        [tuple(row) for row in conn.execute(
+            "SELECT * FROM head_to_head WHERE a_wins OR b_wins ORDER BY a, b")],
+        [tuple(row) for row in conn.execute(
+            "SELECT * FROM rikishi_kimarite WHERE wins OR losses ORDER BY rikishi, kimarite")],
+    )
+
+
+def assert_matches_rebuild(conn):
+    incremental = aggregates(conn)
+    bout_stats.rebuild(conn)
+    assert aggregates(conn) == incremental
+
+
+@pytest.fixture
+def store(tmp_path):
+    conn = bout_store.connect(str(tmp_path / "bouts.sqlite"))
+    bout_stats.ensure_indexes(conn)
+    yield conn
+    conn.close()
+
+
+def test_upsert_count_leaves_out_trigger_writes(store):
+    day_1 = [bout(1, 2, 1, "yorikiri"), bout(3, 4, 4, "oshidashi")]
+    assert bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", day_1) == 2
+    assert bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", day_1[:1]) == 1
+
+
+def test_triggers_track_inserts_updates_and_deletes(store):
+    bout_store.upsert_bouts(store, "202509", 1, "Makuuchi",
+                            [bout(1, 2, 1, "yorikiri"), bout(3, 4, 3, "oshidashi"), bout(5, None, 5)])
+    bout_store.upsert_bouts(store, "202509", 2, "Makuuchi",
+                            [bout(2, 1, 1, "yorikiri"), bout(4, 3)])
+    assert bout_stats.head_to_head(store, 1, 2) == (2, 0)
+    assert bout_stats.record(store, 1) == (2, 0)
+    assert bout_stats.record(store, 5) == (0, 0)  # unresolved opponent, not counted
+    assert_matches_rebuild(store)
+
+    # A corrected result moves the win, and an undecided bout deciding adds one
+    bout_store.upsert_bouts(store, "202509", 2, "Makuuchi",
+                            [bout(2, 1, 2, "hatakikomi"), bout(4, 3, 4, "tsukiotoshi")])
+    assert bout_stats.head_to_head(store, 1, 2) == (1, 1)
+    assert bout_stats.head_to_head(store, 3, 4) == (1, 1)
+    assert bout_stats.kimarite_distribution(store, 2) == [("hatakikomi", 1)]
+    assert_matches_rebuild(store)
+
+    bout_store.upsert_bouts(store, "202509", 2, "Makuuchi", [])
+    assert bout_stats.head_to_head(store, 1, 2) == (1, 0)
+    assert bout_stats.record(store, 4) == (0, 1)
+    assert_matches_rebuild(store)
+
+
+def test_stats_only_count_earlier_days(store):
+    bout_store.upsert_bouts(store, "202507", 15, "Makuuchi", [bout(1, 2, 2, "oshidashi")])
+    bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", [bout(1, 2, 1, "yorikiri")])
+    bout_store.upsert_bouts(store, "202509", 2, "Makuuchi", [bout(2, 1, 1, "yorikiri")])
+
+    stats = bout_stats.bout_stats(store, bout(1, 2, 1, "yorikiri"), "202509", 1)
+    assert stats["h2h"] == [0, 1]
+    assert stats["east"] == {"w": 0, "l": 1, "streak": -1, "kimarite": []}
+    assert stats["west"] == {"w": 1, "l": 0, "streak": 1, "kimarite": [["oshidashi", 1]]}
+
+    stats = bout_stats.bout_stats(store, bout(2, 1, 1, "yorikiri"), "202509", 2)
+    assert stats["h2h"] == [1, 1]
+    assert stats["west"]["streak"] == 1
+
+
+def test_idle_run_leaves_the_store_untouched(tmp_path):
+    path = tmp_path / "bouts.sqlite"
+    conn = bout_store.connect(str(path))
+    bout_stats.ensure_indexes(conn)
+    bout_store.upsert_bouts(conn, "202509", 1, "Makuuchi", [bout(1, 2, 1, "yorikiri")])
+    conn.close()
+    before = path.read_bytes()
+
+    conn = bout_store.connect(str(path))
+    bout_stats.ensure_indexes(conn)
+    assert bout_store.upsert_bouts(conn, "202509", 1, "Makuuchi", [bout(1, 2, 1, "yorikiri")]) == 0
+    conn.close()
+    assert path.read_bytes() == before
@@ -0,0 +1,56 @@
+"""Bout store upserts."""
+
+import pytest
+
+import bout_store
+
+
+def bout(east, west, winner=None, kimarite=None):
+    return {
+        "east": {"name": f"R{east}", "id": east},
+        "west": {"name": f"R{west}", "id": west},
+        "kimarite": kimarite,
+        "winner": winner,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    conn = bout_store.connect(str(tmp_path / "bouts.sqlite"))
+    yield conn
+    conn.close()
+
+
+def test_upsert_counts_only_changed_rows(store):
+    day_1 = [bout(1, 2, 1, "yorikiri"), bout(3, 4)]
+    assert bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", day_1) == 2
+    assert bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", day_1) == 0
+
+    day_1[1] = bout(3, 4, 4, "oshidashi")
+    assert bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", day_1) == 1
+    assert bout_store.load_bouts(store, "202509", 1, "Makuuchi") == day_1
+
+    # A shrunk torikumi drops the trailing bouts
+    assert bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", day_1[:1]) == 1
+    assert bout_store.load_bouts(store, "202509", 1, "Makuuchi") == day_1[:1]
+
+
+def test_stored_days_and_rikishi_bouts(store):
+    bout_store.upsert_bouts(store, "202509", 2, "Makuuchi", [bout(1, 2, 1, "yorikiri")])
+    bout_store.upsert_bouts(store, "202509", 1, "Juryo", [bout(41, 42)])
+    bout_store.upsert_bouts(store, "202509", 1, "Makuuchi", [bout(2, 1, 2, "oshidashi")])
+    assert bout_store.stored_days(store) == [
+        ("202509", 1, "Juryo"), ("202509", 1, "Makuuchi"), ("202509", 2, "Makuuchi"),
+    ]
+    assert bout_store.stored_days(store, "Juryo") == [("202509", 1, "Juryo")]
+    assert [(b["day"], b["winner"]) for b in bout_store.rikishi_bouts(store, 1)] == [(1, 2), (2, 1)]
+
+
+def test_reopening_leaves_the_file_untouched(tmp_path):
+    path = tmp_path / "bouts.sqlite"
+    bout_store.connect(str(path)).close()
+    before = path.read_bytes()
+    conn = bout_store.connect(str(path))
+    assert bout_store.stored_days(conn) == []
+    conn.close()
+    assert path.read_bytes() == before
@@ -0,0 +1,78 @@
+"""Photo variants and the per-day sprite sheet."""
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import photo_variants
+
+pytest.importorskip("PIL")
+
+PHOTOS_DIR = Path(__file__).resolve().parent.parent / "images"
+NSK_IDS = (3620, 4112, 4175)
+
+
+@pytest.fixture
+def images(tmp_path, monkeypatch):
+    """A working directory holding a few recorded photos in images/."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("PHOTO_AVIF", raising=False)
+    Path("images").mkdir()
+    for nsk_id in NSK_IDS:
+        shutil.copy(PHOTOS_DIR / f"{nsk_id}.jpg", Path("images", f"{nsk_id}.jpg"))
+    return Path("images")
+
+
+def test_variants_are_generated_once_per_source(images):
+    counts = photo_variants.update_variants([*NSK_IDS, 999999])
+    assert counts == {"generated": 3, "skipped": 0, "missing": 1}
+    manifest = photo_variants.load_manifest()
+    assert sorted(manifest) == [str(i) for i in NSK_IDS]
+    for nsk_id in NSK_IDS:
+        entry = manifest[str(nsk_id)]
+        assert entry["f"] == ["webp", "jpeg"]
+        for width in entry["w"]:
+            for fmt in entry["f"]:
+                assert Path(photo_variants.variant_path(nsk_id, width, fmt)).exists()
+
+    assert photo_variants.update_variants(NSK_IDS)["skipped"] == 3
+
+    # A new photo, or a deleted variant, regenerates just that wrestler
+    shutil.copy(PHOTOS_DIR / "4231.jpg", images / "3620.jpg")
+    Path(photo_variants.variant_path(4112, manifest["4112"]["w"][0], "webp")).unlink()
+    assert photo_variants.update_variants(NSK_IDS) == {"generated": 2, "skipped": 1, "missing": 0}
+
+
+def sprite_sheets():
+    return sorted(p.name for p in Path("images", "sprites").glob("sprite.*.*") if p.suffix != ".json")
+
+
+def test_sprite_tracks_the_day_and_keeps_the_previous_sheet(images):
+    assert photo_variants.update_sprite([4175, 3620])
+    with open(photo_variants.SPRITE_INDEX, encoding="utf-8") as f:
+        first = json.load(f)
+    width, height = photo_variants.SPRITE_TILE
+    assert first["tiles"] == {"3620": [0, 0], "4175": [width, 0]}
+    assert sprite_sheets() == [f"{first['file']}.jpg", f"{first['file']}.webp"]
+    assert not photo_variants.update_sprite([3620, 4175])
+
+    assert photo_variants.update_sprite(NSK_IDS)
+    with open(photo_variants.SPRITE_INDEX, encoding="utf-8") as f:
+        second = json.load(f)
+    assert second["tiles"]["4175"] == [0, height]
+    assert len(sprite_sheets()) == 4  # the previous sheet stays for the old index
+
+    # Anything older than the previous sheet is removed
+    assert photo_variants.update_sprite([4112, 4175])
+    with open(photo_variants.SPRITE_INDEX, encoding="utf-8") as f:
+        third = json.load(f)
+    assert {Path(name).stem for name in sprite_sheets()} == {second["file"], third["file"]}
+
+
+def test_sprite_skips_wrestlers_without_a_photo(images):
+    assert not photo_variants.update_sprite([999999])
+    assert photo_variants.update_sprite([4175, 999999])
+    with open(photo_variants.SPRITE_INDEX, encoding="utf-8") as f:
+        assert list(json.load(f)["tiles"]) == ["4175"]
@@ -0,0 +1,146 @@
+"""scrape_rikishi_photos against the stub sumo.or.jp server."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import scrape_rikishi_photos
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+PHOTOS_DIR = REPO_DIR / "images"
+PROFILE_FIXTURE = REPO_DIR / "bench" / "fixtures" / "sumo.or.jp" / "profile.html"
+# nskIds of two Makuuchi rikishi with recorded photos
+NSK_IDS = (4175, 4231)
+
+
+def write_matches(*nsk_ids):
+    """Write a matches.json pairing up the given nskIds."""
+    bouts = [
+        {"east": {"name": f"E{east}", "id": east}, "west": {"name": f"W{west}", "id": west},
+         "kimarite": None, "winner": None}
+        for east, west in zip(nsk_ids[::2], nsk_ids[1::2])
+    ]
+    with open("matches.json", "w", encoding="utf-8") as f:
+        json.dump(bouts, f)
+
+
+@pytest.fixture
+def matches_only(photos_env, monkeypatch):
+    """Sync only the wrestlers in a two-rikishi matches.json."""
+    monkeypatch.setenv("PHOTO_SOURCE", "matches")
+    write_matches(*NSK_IDS)
+    return photos_env
+
+
+def run(server):
+    """Run the photo scraper and return the stub requests it made."""
+    before = server.stats["requests"]
+    scrape_rikishi_photos.main()
+    return server.stats["requests"] - before
+
+
+def test_second_run_skips_photos_already_on_disk(matches_only):
+    assert run(matches_only) == 4  # a profile page and a photo each
+    for nsk_id in NSK_IDS:
+        assert Path("images", f"{nsk_id}.jpg").read_bytes() == (PHOTOS_DIR / f"{nsk_id}.jpg").read_bytes()
+    with open("photo_manifest.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)) == [str(i) for i in NSK_IDS]
+
+    assert run(matches_only) == 0
+
+
+def test_photo_without_manifest_entry_is_adopted(matches_only):
+    Path("images").mkdir()
+    Path("images", f"{NSK_IDS[0]}.jpg").write_bytes((PHOTOS_DIR / f"{NSK_IDS[0]}.jpg").read_bytes())
+    assert run(matches_only) == 2  # only the missing photo is fetched
+    with open("photo_manifest.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)) == [str(i) for i in NSK_IDS]
+
+
+def test_full_sync_revalidates_with_etag(matches_only, monkeypatch, capsys):
+    run(matches_only)
+    with open("photo_manifest.json", encoding="utf-8") as f:
+        assert all(entry.get("etag") for entry in json.load(f).values())
+    capsys.readouterr()
+
+    monkeypatch.setenv("PHOTO_SYNC", "full")
+    before = matches_only.stats["bytes"]
+    assert run(matches_only) == 4
+    out = capsys.readouterr().out
+    assert out.count("not modified") == 2
+    assert "Re-checked, unchanged: 2" in out
+    # Only the profile pages have a body; the photos come back 304
+    assert matches_only.stats["bytes"] - before < sum(
+        (PHOTOS_DIR / f"{nsk_id}.jpg").stat().st_size for nsk_id in NSK_IDS)
+
+
+def test_locally_changed_photo_is_downloaded_unconditionally(matches_only, capsys):
+    run(matches_only)
+    photo = Path("images", f"{NSK_IDS[0]}.jpg")
+    photo.write_bytes(b"\xff" * 2048)
+    capsys.readouterr()
+
+    assert run(matches_only) == 2
+    assert "Downloaded photo for wrestler ID 4175" in capsys.readouterr().out
+    assert photo.read_bytes() == (PHOTOS_DIR / photo.name).read_bytes()
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_pipeline_counts_and_failures(photos_env, monkeypatch, workers):
+    monkeypatch.setattr(scrape_rikishi_photos, "PROFILE_WORKERS", workers)
+    monkeypatch.setattr(scrape_rikishi_photos, "DOWNLOAD_WORKERS", workers)
+    scrape_rikishi_photos.create_images_directory()
+    wrestler_ids = {3620, 4112, 4175, 4231, 999999}  # no photo is recorded for 999999
+    manifest = {}
+    counts, failed = scrape_rikishi_photos.sync_photos(wrestler_ids, manifest)
+    assert counts == {"skipped": 0, "new": 4, "updated": 0, "unchanged": 0}
+    assert failed == 1
+    assert sorted(manifest) == ["3620", "4112", "4175", "4231"]
+    assert sorted(p.name for p in Path("images").iterdir()) == ["3620.jpg", "4112.jpg", "4175.jpg", "4231.jpg"]
+
+
+@pytest.mark.parametrize("limit, value", [("MAX_PHOTO_BYTES", 4096), ("MIN_PHOTO_BYTES", 10 ** 7)])
+def test_rejected_download_keeps_the_previous_photo(matches_only, monkeypatch, capsys, limit, value):
+    run(matches_only)
+    photo = Path("images", f"{NSK_IDS[0]}.jpg")
+    photo.write_bytes(b"\xff" * 2048)
+    monkeypatch.setattr(scrape_rikishi_photos, limit, value)
+    capsys.readouterr()
+
+    run(matches_only)
+    assert "Failed: 1" in capsys.readouterr().out
+    assert photo.read_bytes() == b"\xff" * 2048
+    assert not [p for p in Path("images").iterdir() if p.name.endswith(".part")]
+
+
+@pytest.mark.parametrize("parser", ["fast", "strainer", "soup"])
+def test_photo_parsers_agree(parser):
+    html = PROFILE_FIXTURE.read_text(encoding="utf-8").replace("{nskId}", "4175")
+    assert scrape_rikishi_photos.extract_photo_src(html, parser) == "/img/sumo_data/rikishi/270x474/4175.jpg"
+    assert scrape_rikishi_photos.extract_photo_src(html.encode("utf-8"), parser) == \
+        "/img/sumo_data/rikishi/270x474/4175.jpg"
+
+    # Without a rikishi_photo image, the first *photo* class is used
+    fallback = '<img src="/logo.png"><img class="main_Photo" src="/a.jpg"><img class="photo" src="/b.jpg">'
+    assert scrape_rikishi_photos.extract_photo_src(fallback, parser) == "/a.jpg"
+    assert scrape_rikishi_photos.extract_photo_src("<p>no photo</p>", parser) is None
+
+
+def test_unknown_photo_parser_is_rejected():
+    with pytest.raises(ValueError):
+        scrape_rikishi_photos.extract_photo_src("<img>", "regex")
+
+
+def test_banzuke_and_matches_drive_the_sync(photos_env, monkeypatch):
+    monkeypatch.setenv("DIVISIONS", "Juryo")
+    write_matches(*NSK_IDS, 4287, None)  # the last rikishi is unresolved
+    run(photos_env)
+    juryo = {12721, 12780, 12796, 12800}
+    assert {int(p.stem) for p in Path("images").glob("*.jpg")} == juryo | set(NSK_IDS) | {4287}
+    with open("rikishi.json", encoding="utf-8") as f:
+        assert {int(i) for i in json.load(f)} >= juryo
+    assert Path("rikishi_cache.json").exists()
+    # The sprite only covers today's bouts
+    with open("images/sprites/sprite.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)["tiles"]) == sorted(str(i) for i in (*NSK_IDS, 4287))
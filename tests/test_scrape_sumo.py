@@ -0,0 +1,247 @@
+"""scrape_sumo against the stub sumo-api server."""
+
+import gzip
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import rikishi_cache
+import scrape_sumo
+
+BASHO = "202509"
+MAKUUCHI_DAY_2 = (BASHO, 2, "Makuuchi")
+
+
+def requests_during(server, func, *args, **kwargs):
+    """Call func and return (its result, the stub requests it made)."""
+    before = server.stats["requests"]
+    result = func(*args, **kwargs)
+    return result, server.stats["requests"] - before
+
+
+def test_prefetch_then_single_lookup_fallback(scrape_env):
+    cache = rikishi_cache.new_cache()
+    nsk_ids, made = requests_during(scrape_env, scrape_sumo.resolve_rikishi_ids, [1, 2, 3], cache, basho=BASHO)
+    assert nsk_ids == {1: 4175, 2: 4231, 3: 4287}
+    assert made == 1  # the whole listing fits in one page
+    assert rikishi_cache.was_prefetched(cache, BASHO)
+
+    # A miss after the prefetch falls back to a single lookup, not a second listing
+    rikishi_cache.invalidate(cache, [2])
+    nsk_ids, made = requests_during(scrape_env, scrape_sumo.resolve_rikishi_ids, [1, 2, 3], cache, basho=BASHO)
+    assert nsk_ids == {1: 4175, 2: 4231, 3: 4287}
+    assert made == 1
+
+
+def test_prefetch_disabled_uses_single_lookups(scrape_env, monkeypatch):
+    monkeypatch.setenv("RIKISHI_PREFETCH", "0")
+    cache = rikishi_cache.new_cache()
+    nsk_ids, made = requests_during(scrape_env, scrape_sumo.resolve_rikishi_ids, [1, 2, 2, None], cache, basho=BASHO)
+    assert nsk_ids == {1: 4175, 2: 4231}
+    assert made == 2
+    assert not rikishi_cache.was_prefetched(cache, BASHO)
+
+
+def test_unchanged_run_skips_resolution(scrape_env, capsys):
+    _, made = requests_during(scrape_env, scrape_sumo.main, [])
+    assert made == 2  # torikumi plus the rikishi listing
+    with open("matches.json", encoding="utf-8") as f:
+        bouts = json.load(f)
+    assert len(bouts) == 20
+    assert all(bout["east"]["id"] and bout["west"]["id"] for bout in bouts)
+    capsys.readouterr()
+    outputs = {path: path.read_bytes() for path in Path().rglob("*") if path.is_file()}
+
+    _, made = requests_during(scrape_env, scrape_sumo.main, [])
+    assert made == 1  # only the torikumi, to compare its hash
+    assert "Torikumi unchanged since last run" in capsys.readouterr().out
+    # Nothing the workflow commits may change, bouts.sqlite included
+    outputs.pop(Path("run_report.jsonl"), None)
+    assert {path: path.read_bytes() for path in outputs} == outputs
+
+
+def test_unresolved_ids_are_retried(scrape_env, capsys):
+    records = scrape_env.rikishi_records
+    scrape_env.rikishi_records = [r for r in records if r["id"] != 1]
+    scrape_sumo.main([])
+    assert scrape_sumo.state_key(*MAKUUCHI_DAY_2) not in scrape_sumo.load_state()["torikumi"]
+    capsys.readouterr()
+
+    # The rikishi is listed again, so the next run resolves it
+    scrape_env.rikishi_records = records
+    scrape_sumo.main([])
+    assert "Torikumi unchanged" not in capsys.readouterr().out
+    with open("matches.json", encoding="utf-8") as f:
+        assert all(bout["east"]["id"] and bout["west"]["id"] for bout in json.load(f))
+    assert scrape_sumo.state_key(*MAKUUCHI_DAY_2) in scrape_sumo.load_state()["torikumi"]
+
+
+def test_blank_divisions_default_to_makuuchi(monkeypatch):
+    # Scheduled workflow runs export DIVISIONS as an empty input
+    monkeypatch.setenv("DIVISIONS", "")
+    assert scrape_sumo.parse_args([]).divisions == "Makuuchi"
+    assert scrape_sumo.normalize_divisions(["", " "]) == ["Makuuchi"]
+    assert scrape_sumo.normalize_divisions("juryo,,MAKUUCHI,".split(",")) == ["Juryo", "Makuuchi"]
+    with pytest.raises(ValueError):
+        scrape_sumo.normalize_divisions(["maku"])
+
+
+def test_blank_divisions_env_scrapes_makuuchi(scrape_env, monkeypatch):
+    monkeypatch.setenv("DIVISIONS", "")
+    scrape_sumo.main([])
+    with open("matches.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 20
+
+
+def hashed_copies():
+    return sorted(str(path) for path in Path().glob("matches.*.json") if path.name != "matches.stats.json")
+
+
+def test_hashed_output_manifest_follows_the_latest_day(scrape_env, monkeypatch):
+    monkeypatch.setattr(scrape_sumo, "HASHED_OUTPUT", True)
+    monkeypatch.setenv("DAY", "1")
+    scrape_sumo.main([])
+    with open("matches.manifest.json", encoding="utf-8") as f:
+        day_1 = json.load(f)
+    assert Path(day_1["file"]).read_bytes() == Path("matches.json").read_bytes()
+    assert day_1["bouts"] == 20
+
+    monkeypatch.setenv("DAY", "2")
+    scrape_sumo.main([])
+    with open("matches.manifest.json", encoding="utf-8") as f:
+        day_2 = json.load(f)
+    assert Path(day_2["file"]).read_bytes() == Path("matches.json").read_bytes()
+    # The previous copy stays for clients holding the old manifest
+    assert hashed_copies() == sorted(["matches.manifest.json", day_1["file"], day_2["file"]])
+
+
+def test_turning_hashed_output_off_removes_the_manifest(scrape_env, monkeypatch):
+    monkeypatch.setattr(scrape_sumo, "HASHED_OUTPUT", True)
+    monkeypatch.setenv("DAY", "1")
+    scrape_sumo.main([])
+    assert Path("matches.manifest.json").exists()
+
+    monkeypatch.setattr(scrape_sumo, "HASHED_OUTPUT", False)
+    monkeypatch.setenv("DAY", "2")
+    scrape_sumo.main([])
+    # Otherwise the page keeps loading day 1 through the stale manifest
+    assert hashed_copies() == []
+
+
+def test_output_format_change_rewrites_without_lookups(scrape_env, monkeypatch):
+    scrape_sumo.main([])
+    monkeypatch.setattr(scrape_sumo, "OUTPUT_FORMAT", "minified")
+    _, made = requests_during(scrape_env, scrape_sumo.main, [])
+    assert made == 1
+    with open("matches.json", encoding="utf-8") as f:
+        assert "\n" not in f.read().strip()
+
+
+@pytest.mark.parametrize("output_format", ["pretty", "minified", "columnar"])
+def test_output_formats_round_trip(tmp_path, output_format):
+    bouts = [
+        {"east": {"name": "A", "id": 1}, "west": {"name": "B", "id": 2}, "kimarite": "yorikiri", "winner": 1},
+        {"east": {"name": "C", "id": None}, "west": {"name": "D", "id": 4}, "kimarite": None, "winner": None},
+    ]
+    output_file = str(tmp_path / "matches.json")
+    assert scrape_sumo.write_bouts_if_changed(bouts, output_file, output_format)
+    assert not scrape_sumo.write_bouts_if_changed(bouts, output_file, output_format)
+    with open(output_file, encoding="utf-8") as f:
+        assert scrape_sumo.expand_bouts(json.load(f)) == bouts
+
+
+def test_precompress_toggle_writes_and_removes_siblings(scrape_env, monkeypatch):
+    scrape_sumo.main([])
+    shard = Path("data", BASHO, "2.json")
+    assert shard.exists() and not Path("matches.json.gz").exists()
+
+    monkeypatch.setattr(scrape_sumo, "PRECOMPRESS", True)
+    _, made = requests_during(scrape_env, scrape_sumo.main, [])
+    assert made == 1
+    for path in (Path("matches.json"), shard, Path("data", "index.json")):
+        assert gzip.decompress(Path(f"{path}.gz").read_bytes()) == path.read_bytes()
+
+    monkeypatch.setattr(scrape_sumo, "PRECOMPRESS", False)
+    scrape_sumo.main([])
+    assert list(Path().rglob("*.gz")) == []
+
+
+def test_backfill_writes_day_shards_and_skips_unchanged_days(scrape_env, monkeypatch, capsys):
+    monkeypatch.delenv("DAY")
+    _, made = requests_during(scrape_env, scrape_sumo.main, ["--backfill", "--days", "1-3", "--divisions", "all"])
+    shards = sorted(str(p) for p in Path("data", BASHO).glob("*.json"))
+    assert shards == [f"data/{BASHO}/1.json", f"data/{BASHO}/1_juryo.json", f"data/{BASHO}/2.json",
+                      f"data/{BASHO}/index.json"]
+    # 18 torikumi (3 days x 6 divisions) plus one rikishi listing
+    assert made == 19
+    with open(f"data/{BASHO}/2.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 20
+    state = scrape_sumo.load_state()
+    assert sorted(state["torikumi"]) == sorted(
+        scrape_sumo.state_key(BASHO, day, division) for day, division in ((1, "Makuuchi"), (1, "Juryo"), (2, "Makuuchi")))
+    capsys.readouterr()
+
+    _, made = requests_during(scrape_env, scrape_sumo.main, ["--backfill", "--days", "1-3", "--divisions", "all"])
+    assert made == 18
+    assert "Skipping 3 unchanged torikumi" in capsys.readouterr().out
+
+
+def test_backfill_with_nothing_to_fetch_fails(scrape_env, monkeypatch):
+    monkeypatch.delenv("DAY")
+    with pytest.raises(SystemExit):
+        scrape_sumo.main(["--backfill", "--days", "5"])
+
+
+def test_watch_adapts_its_interval_until_every_bout_is_decided(scrape_env, tmp_path, monkeypatch):
+    fixtures = tmp_path / "fixtures"
+    shutil.copytree(scrape_env.fixtures_dir, fixtures)
+    scrape_env.fixtures_dir = fixtures
+    day_1 = fixtures / "sumo-api" / "basho" / BASHO / "torikumi" / "Makuuchi" / "1.json"
+    payload = json.loads(day_1.read_text(encoding="utf-8"))
+
+    def decide(count):
+        for bout in payload["torikumi"][:count]:
+            bout.update(winnerId=bout["eastId"], winnerEn=bout["eastShikona"], kimarite="yorikiri")
+        day_1.write_text(json.dumps(payload), encoding="utf-8")
+
+    # Each poll's sleep advances the day: half the results, a quiet poll, the rest
+    steps = iter([lambda: decide(10), lambda: None, lambda: decide(20)])
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        next(steps)()
+
+    monkeypatch.setattr(scrape_sumo.time, "sleep", sleep)
+    monkeypatch.setenv("DAY", "1")
+    scrape_sumo.main(["--watch", "--poll-min", "30", "--poll-max", "600"])
+    assert sleeps == [30, 30, 60]
+    with open("matches.json", encoding="utf-8") as f:
+        bouts = json.load(f)
+    assert all(bout["winner"] == bout["east"]["id"] for bout in bouts)
+    # Rikishi were resolved once; later polls only rebuilt changed bouts
+    assert scrape_env.stats["requests"] == 5
+
+
+def test_daily_runs_export_static_shards(scrape_env, monkeypatch):
+    for day in ("1", "2"):
+        monkeypatch.setenv("DAY", day)
+        scrape_sumo.main([])
+
+    def load(*parts):
+        with open(Path("data", *parts), encoding="utf-8") as f:
+            return json.load(f)
+
+    assert load("index.json") == {"basho": [BASHO]}
+    assert load(BASHO, "index.json") == {"basho": BASHO, "days": {"Makuuchi": [1, 2]}}
+    with open("matches.json", encoding="utf-8") as f:
+        assert load(BASHO, "2.json") == json.load(f)
+
+    # Asahakuryu (4175) met Onokatsu (4231) on day 1 and beat Mitakeumi (3620) on day 2
+    shard = load("rikishi", "4175.json")
+    assert shard["id"] == 4175 and shard["name"] == "Asahakuryu"
+    rows = [dict(zip(shard["fields"], row)) for row in shard["bouts"]]
+    assert [(row["day"], row["opponent"], row["result"]) for row in rows] == [(1, 4231, None), (2, 3620, "W")]
+    assert rows[1]["kimarite"] == "yorikiri"